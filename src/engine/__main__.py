@@ -0,0 +1,5 @@
+import sys
+
+from src.engine.cli import main
+
+sys.exit(main())
@@ -0,0 +1,91 @@
+from src.engine.compiler import (OP_AND, OP_OR, OP_XOR, OP_NOT, OP_NAND,
+                                 OP_NOR, OP_XNOR, OP_BUF)
+
+
+def _load_numpy():
+    """Import NumPy on first use; it is only needed for batch evaluation"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Batch evaluation requires NumPy (pip install numpy)")
+    return numpy
+
+
+def evaluate_batch(compiled, inputs, chunk=1 << 16):
+    """Evaluate a matrix of stimulus vectors with vectorized NumPy ops
+
+    Each input column is packed into uint64 words, 64 vectors per word, and
+    every instruction becomes one bitwise NumPy operation over those words.
+
+    Args:
+        compiled: CompiledCircuit to evaluate
+        inputs: Bool array of shape (n_vectors, n_inputs), columns in the
+            order of compiled.inputs
+        chunk: Vectors evaluated per pass, bounds the working memory
+
+    Returns:
+        Bool array of shape (n_vectors, n_outputs)
+    """
+    np = _load_numpy()
+    inputs = np.asarray(inputs, dtype=bool)
+    if inputs.ndim != 2 or inputs.shape[1] != len(compiled.inputs):
+        raise ValueError(
+            f"Expected an array of shape (n_vectors, {len(compiled.inputs)}), "
+            f"got {inputs.shape}"
+        )
+
+    n_vectors = inputs.shape[0]
+    result = np.empty((n_vectors, len(compiled.outputs)), dtype=bool)
+    chunk = max(64, chunk - chunk % 64)
+
+    for first in range(0, n_vectors, chunk):
+        block = inputs[first:first + chunk]
+        rows = block.shape[0]
+        n_words = (rows + 63) // 64
+
+        # One row of words per input, bit j of word k is vector 64 * k + j
+        bits = np.zeros((block.shape[1], n_words * 64), dtype=bool)
+        bits[:, :rows] = block.T
+        words = np.packbits(bits, axis=1, bitorder="little").view("<u8")
+
+        values = np.zeros((compiled.size, n_words), dtype=np.uint64)
+        values[compiled.input_slots] = words
+        _run(np, compiled.instructions, values)
+
+        outputs = np.ascontiguousarray(values[compiled.output_slots]).view(np.uint8)
+        out_bits = np.unpackbits(outputs, axis=1, bitorder="little")
+        result[first:first + rows] = out_bits[:, :rows].T
+
+    return result
+
+
+def _run(np, instructions, values):
+    """Execute the instruction list over rows of packed words"""
+    bitwise_and = np.bitwise_and
+    bitwise_or = np.bitwise_or
+    bitwise_xor = np.bitwise_xor
+    invert = np.invert
+
+    for op, a, b, out in instructions:
+        target = values[out]
+        if op == OP_AND:
+            bitwise_and(values[a], values[b], out=target)
+        elif op == OP_OR:
+            bitwise_or(values[a], values[b], out=target)
+        elif op == OP_XOR:
+            bitwise_xor(values[a], values[b], out=target)
+        elif op == OP_NOT:
+            invert(values[a], out=target)
+        elif op == OP_NAND:
+            bitwise_and(values[a], values[b], out=target)
+            invert(target, out=target)
+        elif op == OP_NOR:
+            bitwise_or(values[a], values[b], out=target)
+            invert(target, out=target)
+        elif op == OP_XNOR:
+            bitwise_xor(values[a], values[b], out=target)
+            invert(target, out=target)
+        elif op == OP_BUF:
+            target[:] = values[a]
+        else:
+            target[:] = 0
@@ -0,0 +1,63 @@
+def simulate(compiled, input_words, width):
+    """Evaluate many input vectors in one pass over a compiled circuit
+
+    Every signal is an int whose bit j belongs to test vector j, so each gate
+    is a single bitwise operation over all vectors.
+
+    Args:
+        compiled: CompiledCircuit to evaluate
+        input_words: One int per circuit input, in the order of compiled.inputs
+        width: Number of vectors packed into each word
+
+    Returns:
+        List of output words in the order of compiled.outputs
+    """
+    mask = (1 << width) - 1
+    words = [word & mask for word in input_words]
+    outputs = compiled.function()(*words, m=mask)
+    return list(outputs[:len(compiled.outputs)])
+
+
+def exhaustive_words(n_inputs, start, width):
+    """Input words for rows start to start + width - 1 of a truth table
+
+    Rows are numbered with the first input as the most significant bit, as in
+    a written truth table. width must be a power of two and start a multiple
+    of it, so the low inputs cycle in fixed patterns and the high inputs are
+    constant across the word.
+    """
+    mask = (1 << width) - 1
+    words = []
+    for i in range(n_inputs):
+        bit = n_inputs - 1 - i
+        block = 1 << bit
+        if block < width:
+            # Runs of block zeros then block ones, repeated across the word
+            unit = ((1 << block) - 1) << block
+            words.append(unit * (mask // ((1 << (2 * block)) - 1)))
+        else:
+            words.append(mask if (start >> bit) & 1 else 0)
+    return words
+
+
+def truth_table_words(compiled, start=0, stop=None, width=4096):
+    """Enumerate truth table rows in words of width vectors
+
+    Args:
+        compiled: CompiledCircuit to evaluate
+        start: First row, a multiple of the effective width
+        stop: Row to stop before, defaults to every combination of inputs
+        width: Vectors per pass, a power of two
+
+    Yields:
+        (first_row, rows, output_words) for each pass
+    """
+    n_inputs = len(compiled.inputs)
+    if stop is None:
+        stop = 1 << n_inputs
+    width = min(width, 1 << n_inputs)
+
+    for first in range(start, stop, width):
+        rows = min(width, stop - first)
+        words = exhaustive_words(n_inputs, first, width)
+        yield first, rows, simulate(compiled, words, rows)
@@ -0,0 +1,395 @@
+from array import array
+from contextlib import contextmanager
+
+from src.engine.gates import (GATE_FUNCTIONS, GATE_PINS, SOURCE_KINDS, SINK_KINDS,
+                              SEQUENTIAL_KINDS, SUBCIRCUIT, BUS_KINDS, MAX_BUS_WIDTH)
+from src.engine.scheduler import EventScheduler
+from src.engine.compiler import CompiledCircuit
+from src.engine.cones import ConeIndex
+
+
+class Circuit:
+    """Headless netlist with array-backed signal storage
+
+    Gates and nets are addressed by integer ids. Every gate output drives its
+    own net and input pins refer to the net they read. Net 0 is tied low and
+    is what unconnected input pins read from. Removed gates keep their id
+    with a kind of None so ids held elsewhere stay valid.
+
+    Every pin of a gate has the gate's width. Nets of wider gates carry
+    buses as ints, and the gate applies its operation to all bits at once.
+    Only pins of equal width can be connected.
+    """
+
+    GROUND = 0
+
+    def __init__(self):
+        # Per gate
+        self.kinds = []
+        self.names = []
+        self.gate_inputs = []
+        self.gate_outputs = []
+
+        # All-ones value of each gate's width
+        self.masks = []
+
+        # Per net
+        self.values = array("Q", [0])
+        self.net_driver = [-1]
+        self.net_fanout = [[]]
+
+        # Clock level each flip-flop saw last, for edge detection
+        self.clock_levels = {}
+
+        # SubcircuitDefinition of each subcircuit gate
+        self.definitions = {}
+
+        # Bumped on every structural change so derived data can be cached
+        self.version = 0
+
+        # Callables receiving the set of changed nets after each propagation
+        self.observers = []
+
+        self.scheduler = EventScheduler(self)
+        self.cones = ConeIndex(self)
+        self._compiled = None
+        self._bulk = 0
+
+    def add_gate(self, kind, inputs=None, outputs=None, name=""):
+        """Add a gate and return its id
+
+        Args:
+            kind: Gate kind from src.engine.gates
+            inputs: Number of input pins, defaults to the kind's usual count
+            outputs: Number of output pins, defaults to the kind's usual count
+            name: Optional title used to look the gate up later
+        """
+        default_inputs, default_outputs = GATE_PINS.get(kind, (1, 1))
+        if inputs is None:
+            inputs = default_inputs
+        if outputs is None:
+            outputs = default_outputs
+
+        gate = len(self.kinds)
+        self.kinds.append(kind)
+        self.names.append(name)
+        self.masks.append(1)
+        self.gate_inputs.append([self.GROUND] * inputs)
+
+        out_nets = []
+        for _ in range(outputs):
+            net = len(self.values)
+            self.values.append(0)
+            self.net_driver.append(gate)
+            self.net_fanout.append([])
+            out_nets.append(net)
+        self.gate_outputs.append(out_nets)
+
+        self.version += 1
+        self.cones.add_gate(gate)
+        return gate
+
+    def add_subcircuit(self, definition, name=""):
+        """Add an instance of a SubcircuitDefinition and return its id"""
+        gate = self.add_gate(SUBCIRCUIT, len(definition.inputs), len(definition.outputs),
+                             name or definition.name)
+        self.definitions[gate] = definition
+        return gate
+
+    def remove_gate(self, gate):
+        """Detach a gate from the netlist
+
+        Returns:
+            List of gates that lost a driver and need re-evaluation
+        """
+        for pin in range(len(self.gate_inputs[gate])):
+            self.disconnect(gate, pin)
+
+        affected = []
+        for net in self.gate_outputs[gate]:
+            for reader in self.net_fanout[net]:
+                ins = self.gate_inputs[reader]
+                for pin, source in enumerate(ins):
+                    if source == net:
+                        ins[pin] = self.GROUND
+                if reader not in affected:
+                    affected.append(reader)
+            self.net_fanout[net] = []
+            self.net_driver[net] = -1
+            self.values[net] = 0
+
+        self.kinds[gate] = None
+        self.clock_levels.pop(gate, None)
+        self.definitions.pop(gate, None)
+        self.version += 1
+        self.cones.invalidate()
+        return affected
+
+    def set_width(self, gates, width):
+        """Make every pin of the given gates width bits wide
+
+        Wires between the gates are kept; wires to pins of another width
+        are disconnected.
+
+        Raises:
+            ValueError: If a gate's kind has no bus form or width is out of
+                range; no gate is changed then
+
+        Returns:
+            List of gates that need re-evaluation
+        """
+        if not 1 <= width <= MAX_BUS_WIDTH:
+            raise ValueError(f"Bus width must be between 1 and {MAX_BUS_WIDTH}")
+        for gate in gates:
+            if width > 1 and self.kinds[gate] not in BUS_KINDS:
+                raise ValueError(f"{self.kinds[gate]} gates cannot carry a bus")
+
+        mask = (1 << width) - 1
+        gates = [gate for gate in gates if self.masks[gate] != mask]
+        for gate in gates:
+            self.masks[gate] = mask
+
+        affected = list(gates)
+        for gate in gates:
+            for pin, net in enumerate(self.gate_inputs[gate]):
+                if net != self.GROUND and self.masks[self.net_driver[net]] != mask:
+                    self.disconnect(gate, pin)
+
+            for net in self.gate_outputs[gate]:
+                self.values[net] &= mask
+                for reader in list(self.net_fanout[net]):
+                    if self.masks[reader] != mask:
+                        for pin, source in enumerate(self.gate_inputs[reader]):
+                            if source == net:
+                                self.disconnect(reader, pin)
+                        affected.append(reader)
+        if gates:
+            self.version += 1
+        return affected
+
+    def width(self, gate):
+        """Number of bits carried by each pin of a gate"""
+        return self.masks[gate].bit_length()
+
+    def fit_value(self, gate, value):
+        """Value as a gate's pins carry it
+
+        Single-bit gates treat any true value as 1; buses keep the bits
+        that fit their width.
+        """
+        mask = self.masks[gate]
+        if mask == 1:
+            return 1 if value else 0
+        return int(value) & mask
+
+    def net_width(self, net):
+        """Number of bits carried by a net"""
+        driver = self.net_driver[net]
+        return self.width(driver) if driver >= 0 else 1
+
+    def connect(self, src_gate, src_pin, dst_gate, dst_pin):
+        """Drive an input pin from a gate output, replacing any old driver
+
+        Raises:
+            ValueError: If the pins have different widths
+        """
+        if self.masks[src_gate] != self.masks[dst_gate]:
+            raise ValueError(
+                f"Cannot connect a {self.width(src_gate)}-bit output "
+                f"to a {self.width(dst_gate)}-bit input"
+            )
+        net = self.gate_outputs[src_gate][src_pin]
+        ins = self.gate_inputs[dst_gate]
+        old = ins[dst_pin]
+        if old == net:
+            return net
+        if old != self.GROUND:
+            self.net_fanout[old].remove(dst_gate)
+            self.cones.invalidate()
+        ins[dst_pin] = net
+        self.net_fanout[net].append(dst_gate)
+        self.version += 1
+        if not self._bulk:
+            self.scheduler.add_edge(src_gate, dst_gate)
+            self.cones.add_edge(src_gate, dst_gate)
+        return net
+
+    @contextmanager
+    def bulk_edit(self):
+        """Add many gates and wires without updating ranks and cones per wire
+
+        Keeping them current costs up to a walk of the new wire's fan-out
+        cone per connect, which adds up to quadratic time when a long chain
+        is wired back to front. Inside the block both are left stale and
+        rebuilt in one linear pass when next used.
+        """
+        self._bulk += 1
+        self.scheduler.invalidate()
+        self.cones.invalidate()
+        try:
+            yield self
+        finally:
+            self._bulk -= 1
+            self.scheduler.invalidate()
+            self.cones.invalidate()
+
+    def disconnect(self, dst_gate, dst_pin, net=None):
+        """Tie an input pin low
+
+        Args:
+            net: Only disconnect if the pin is still driven by this net
+
+        Returns:
+            True if the pin was disconnected
+        """
+        ins = self.gate_inputs[dst_gate]
+        old = ins[dst_pin]
+        if old == self.GROUND or (net is not None and old != net):
+            return False
+        self.net_fanout[old].remove(dst_gate)
+        ins[dst_pin] = self.GROUND
+        self.version += 1
+        self.cones.invalidate()
+        return True
+
+    def gates(self):
+        """Ids of all live gates"""
+        return [gate for gate, kind in enumerate(self.kinds) if kind is not None]
+
+    def input_gates(self):
+        """Ids of all source gates in creation order"""
+        return [gate for gate, kind in enumerate(self.kinds) if kind in SOURCE_KINDS]
+
+    def output_gates(self):
+        """Ids of all sink gates in creation order"""
+        return [gate for gate, kind in enumerate(self.kinds) if kind in SINK_KINDS]
+
+    def find(self, name):
+        """Id of the first live gate with the given name, or None"""
+        for gate, gate_name in enumerate(self.names):
+            if gate_name == name and self.kinds[gate] is not None:
+                return gate
+        return None
+
+    def output_value(self, gate, pin=0):
+        """Value driven by a gate output pin"""
+        return self.values[self.gate_outputs[gate][pin]]
+
+    def input_value(self, gate, pin=0):
+        """Value seen by a gate input pin"""
+        return self.values[self.gate_inputs[gate][pin]]
+
+    def evaluate(self, gate):
+        """Recompute a gate's outputs
+
+        Returns:
+            List of nets whose value changed
+        """
+        kind = self.kinds[gate]
+        values = self.values
+        if kind in SEQUENTIAL_KINDS:
+            value = self._clock_flip_flop(gate)
+        elif kind == SUBCIRCUIT:
+            return self._evaluate_subcircuit(gate)
+        else:
+            function = GATE_FUNCTIONS.get(kind)
+            if function is None:
+                return []
+            value = function(values, self.gate_inputs[gate], self.masks[gate])
+
+        changed = []
+        for net in self.gate_outputs[gate]:
+            if values[net] != value:
+                values[net] = value
+                changed.append(net)
+        return changed
+
+    def _evaluate_subcircuit(self, gate):
+        """Recompute each output of a subcircuit with its shared function"""
+        definition = self.definitions.get(gate)
+        if definition is None:
+            return []
+        values = self.values
+        results = definition.evaluate(values, self.gate_inputs[gate])
+        changed = []
+        for net, value in zip(self.gate_outputs[gate], results):
+            if values[net] != value:
+                values[net] = value
+                changed.append(net)
+        return changed
+
+    def _clock_flip_flop(self, gate):
+        """Next output of a D flip-flop, loading D on a rising clock edge"""
+        values = self.values
+        data, clock = (values[net] for net in self.gate_inputs[gate])
+        previous = self.clock_levels.get(gate, 0)
+        self.clock_levels[gate] = clock
+        if clock and not previous:
+            return data
+        return values[self.gate_outputs[gate][0]]
+
+    def drive(self, gate, value):
+        """Set the outputs of a source or clock gate without propagating
+
+        Returns:
+            List of nets whose value changed
+        """
+        value = self.fit_value(gate, value)
+        changed = []
+        for net in self.gate_outputs[gate]:
+            if self.values[net] != value:
+                self.values[net] = value
+                changed.append(net)
+        return changed
+
+    def set_input(self, gate, value):
+        """Drive a source or clock gate and propagate the change
+
+        Returns:
+            Set of nets whose value changed
+        """
+        changed = set(self.drive(gate, value))
+        readers = [reader for net in changed for reader in self.net_fanout[net]]
+        return self.scheduler.run(readers, changed)
+
+    def set_inputs(self, values):
+        """Drive several source or clock gates, then propagate once
+
+        Args:
+            values: Mapping of gate to value
+
+        Returns:
+            Set of nets whose value changed
+        """
+        changed = set()
+        for gate, value in values.items():
+            changed.update(self.drive(gate, value))
+        readers = [reader for net in changed for reader in self.net_fanout[net]]
+        return self.scheduler.run(readers, changed)
+
+    def propagate(self, gates, changed=None):
+        """Re-evaluate gates and everything downstream of a change
+
+        Args:
+            changed: Optional set of nets already changed, e.g. by drive()
+
+        Returns:
+            Set of nets whose value changed
+        """
+        return self.scheduler.run(gates, changed)
+
+    def compile(self):
+        """Compiled form of the circuit, rebuilt only after topology changes"""
+        if self._compiled is None or self._compiled.version != self.version:
+            self._compiled = CompiledCircuit(self)
+        return self._compiled
+
+    def optimize(self, fixed=None):
+        """Optimized copy of the circuit and its gate mapping, see src.engine.optimizer"""
+        from src.engine.optimizer import optimize
+        return optimize(self, fixed)
+
+    def evaluate_batch(self, inputs):
+        """Evaluate a (n_vectors, n_inputs) bool array, see src.engine.batch"""
+        from src.engine.batch import evaluate_batch
+        return evaluate_batch(self.compile(), inputs)
@@ -0,0 +1,96 @@
+import argparse
+import csv
+import sys
+
+from src.engine.scene_file import load_circuit
+from src.engine.scheduler import OscillationError
+from src.engine.sequential import CycleSimulator
+from src.engine.stimulus import open_stimulus, bind_inputs, play, parse_vector
+from src.engine.vcd import VcdWriter, circuit_signals
+
+
+def build_parser():
+    """Command-line options"""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.engine",
+        description="Simulate a saved circuit without starting the editor. "
+                    "Inputs and outputs are ordered top to bottom, then left to right."
+    )
+    parser.add_argument("circuit", help="circuit file (.lgs or binary .lgsb)")
+    parser.add_argument("-v", "--vector", action="append", default=[],
+                        help="input bits to apply, one per input, or comma-separated values "
+                             "such as 1,0xF0 for bus inputs; repeat for more steps")
+    parser.add_argument("-s", "--stimulus",
+                        help="CSV or bit-string file of input vectors, streamed one row per step")
+    parser.add_argument("-c", "--cycles", type=int, default=0,
+                        help="clock cycles to run after each step")
+    parser.add_argument("-o", "--output",
+                        help="write output rows to this CSV file instead of standard output")
+    parser.add_argument("--vcd", help="record inputs and outputs to a VCD waveform file")
+    parser.add_argument("--no-optimize", action="store_true",
+                        help="simulate every gate as drawn, without folding constants, "
+                             "merging duplicate gates or dropping unused ones")
+    return parser
+
+
+def run(args):
+    """Simulate as described by parsed arguments and write the output rows"""
+    circuit = load_circuit(args.circuit)
+    inputs = circuit.input_gates()
+    outputs = circuit.output_gates()
+
+    if args.stimulus:
+        columns, rows = open_stimulus(args.stimulus)
+        gates = bind_inputs(circuit, columns)
+    else:
+        gates = inputs
+        widths = [circuit.width(gate) for gate in inputs]
+        rows = [parse_vector(vector, widths) for vector in args.vector]
+
+    if not args.no_optimize:
+        # Inputs no step drives keep their saved value for the whole run
+        driven = set(gates) if args.stimulus or args.vector else set()
+        fixed = {gate: circuit.output_value(gate) for gate in inputs if gate not in driven}
+        circuit, gate_map = circuit.optimize(fixed)
+        outputs = [gate_map[gate] for gate in outputs]
+        gates = [gate_map[gate] for gate in gates]
+
+    vcd = None
+    if args.vcd:
+        vcd = VcdWriter(args.vcd, circuit, circuit_signals(circuit))
+        circuit.observers.append(vcd.record)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow([circuit.names[gate] for gate in outputs])
+        if args.stimulus or args.vector:
+            steps = play(circuit, gates, rows)
+        else:
+            # Nothing to apply: report the saved state
+            steps = [tuple(circuit.input_value(gate) if circuit.gate_inputs[gate] else 0
+                           for gate in outputs)]
+
+        for values in steps:
+            if args.cycles:
+                simulator = CycleSimulator(circuit)
+                values = simulator.run(args.cycles)
+                simulator.store(circuit)
+            writer.writerow(values)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if vcd:
+            vcd.close()
+
+
+def main(argv=None):
+    """Entry point; returns the process exit status"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        run(args)
+    except (OSError, ValueError, OscillationError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
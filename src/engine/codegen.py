@@ -0,0 +1,79 @@
+from src.engine.compiler import (OP_AND, OP_OR, OP_XOR, OP_NOT, OP_NAND,
+                                 OP_NOR, OP_XNOR, OP_BUF)
+
+# Expression templates by opcode; a and b are operand names, m the mask
+_TEMPLATES = {
+    OP_AND: "{a} & {b}",
+    OP_OR: "{a} | {b}",
+    OP_XOR: "{a} ^ {b}",
+    OP_NOT: "m ^ {a}",
+    OP_NAND: "m ^ ({a} & {b})",
+    OP_NOR: "m ^ ({a} | {b})",
+    OP_XNOR: "m ^ {a} ^ {b}",
+    OP_BUF: "{a}",
+}
+
+# Generated functions by circuit structure, shared by equal circuits. The
+# oldest entry is dropped once the cache is full.
+CACHE_SIZE = 32
+_cache = {}
+
+
+def _name(slot):
+    """Variable holding a slot; slot 0 is the constant 0"""
+    return f"s{slot}" if slot else "0"
+
+
+def structure_key(compiled):
+    """Hashable description of everything a generated function depends on"""
+    return (
+        tuple(compiled.input_slots),
+        tuple(compiled.register_slots),
+        tuple(compiled.output_slots),
+        tuple(compiled.next_state_slots),
+        tuple(compiled.instructions),
+    )
+
+
+def generate_source(compiled, name="evaluate"):
+    """Python source of a function evaluating a compiled circuit
+
+    The function takes the inputs in the order of compiled.inputs, then the
+    register outputs (default 0) and the mask m (default 1), and returns the
+    outputs followed by the next register states.
+    """
+    params = [f"s{slot}" for slot in compiled.input_slots]
+    params += [f"s{slot}=0" for slot in compiled.register_slots]
+    params.append("m=1")
+
+    lines = [f"def {name}({', '.join(params)}):"]
+    for op, a, b, out in compiled.instructions:
+        template = _TEMPLATES.get(op)
+        if template is None:
+            lines.append(f"    s{out} = 0")
+        else:
+            lines.append(f"    s{out} = " + template.format(a=_name(a), b=_name(b)))
+
+    results = [_name(slot) for slot in compiled.output_slots + compiled.next_state_slots]
+    lines.append(f"    return ({''.join(result + ', ' for result in results)})")
+    return "\n".join(lines) + "\n"
+
+
+def generate_function(compiled):
+    """Compile a circuit into one Python function, cached by structure
+
+    Every gate becomes a single bitwise statement on local variables, so
+    evaluation has no per-gate dispatch or list indexing. As with
+    CompiledCircuit.run, values may be single bits or words of bits given a
+    wider mask.
+    """
+    key = structure_key(compiled)
+    function = _cache.get(key)
+    if function is None:
+        namespace = {}
+        code = compile(generate_source(compiled), "<generated circuit>", "exec")
+        exec(code, namespace)
+        if len(_cache) >= CACHE_SIZE:
+            del _cache[next(iter(_cache))]
+        function = _cache[key] = namespace["evaluate"]
+    return function
@@ -0,0 +1,204 @@
+from src.engine import gates
+from src.engine.topology import topological_order, find_feedback
+
+# Opcodes of the flat instruction set. Every instruction reads at most two
+# slots, so n-input gates are split into chains of two-input instructions.
+OP_CONST = 0
+OP_BUF = 1
+OP_NOT = 2
+OP_AND = 3
+OP_OR = 4
+OP_XOR = 5
+OP_NAND = 6
+OP_NOR = 7
+OP_XNOR = 8
+
+# Associative operation used to chain wide gates, and whether to invert it
+_CHAINS = {
+    gates.AND: (OP_AND, False),
+    gates.OR: (OP_OR, False),
+    gates.XOR: (OP_XOR, False),
+    gates.NAND: (OP_AND, True),
+    gates.NOR: (OP_OR, True),
+    gates.XNOR: (OP_XOR, True),
+}
+
+_INVERTED = {OP_AND: OP_NAND, OP_OR: OP_NOR, OP_XOR: OP_XNOR}
+
+
+class CompiledCircuit:
+    """Levelized instruction list for evaluating a combinational circuit
+
+    Each instruction is (opcode, slot_a, slot_b, out_slot) and instructions
+    are in topological order, so one pass over the list evaluates the whole
+    circuit. Slot 0 always holds 0 and backs unconnected pins. Subcircuits
+    are flattened: the instructions of their definition are copied in with
+    the slots renumbered.
+    """
+
+    def __init__(self, circuit):
+        loop = find_feedback(circuit)
+        if loop:
+            raise ValueError(
+                f"Cannot compile a circuit with feedback through gates {loop}"
+            )
+        # Words of the compiled forms hold one bit per vector, not buses
+        if any(circuit.masks[gate] != 1 for gate in circuit.gates()):
+            raise ValueError("Cannot compile a circuit with bus-width gates")
+
+        self.version = circuit.version
+        self.inputs = circuit.input_gates()
+        self.outputs = circuit.output_gates()
+        self.registers = [gate for gate in circuit.gates()
+                          if circuit.kinds[gate] in gates.SEQUENTIAL_KINDS]
+        self.names = {gate: circuit.names[gate] for gate in self.inputs + self.outputs}
+
+        # Compact slot numbering; every output pin of a gate shares one slot,
+        # except on subcircuits, whose outputs differ
+        slots = {circuit.GROUND: 0}
+        for gate in circuit.gates():
+            if circuit.kinds[gate] == gates.SUBCIRCUIT:
+                for net in circuit.gate_outputs[gate]:
+                    slots[net] = len(slots)
+            elif circuit.gate_outputs[gate]:
+                slot = len(slots)
+                for net in circuit.gate_outputs[gate]:
+                    slots[net] = slot
+        self.size = len(slots)
+
+        self.input_slots = [slots[circuit.gate_outputs[gate][0]] for gate in self.inputs]
+        self.output_slots = [
+            slots[circuit.gate_inputs[gate][0]] if circuit.gate_inputs[gate] else 0
+            for gate in self.outputs
+        ]
+
+        # Register outputs are read like inputs; their D pins are sampled on
+        # each clock edge by the cycle simulator
+        self.register_slots = [slots[circuit.gate_outputs[gate][0]] for gate in self.registers]
+        self.next_state_slots = [slots[circuit.gate_inputs[gate][0]] for gate in self.registers]
+
+        # Logic that reaches no output or register cannot affect the result
+        live = circuit.cones.live_gates()
+
+        self._function = None
+        self.instructions = []
+        for gate in topological_order(circuit):
+            kind = circuit.kinds[gate]
+            if (kind in gates.SOURCE_KINDS or kind in gates.CLOCK_KINDS or
+                    kind in gates.SEQUENTIAL_KINDS or not circuit.gate_outputs[gate] or
+                    gate not in live):
+                continue
+            ins = [slots[net] for net in circuit.gate_inputs[gate]]
+            if kind == gates.SUBCIRCUIT:
+                outs = [slots[net] for net in circuit.gate_outputs[gate]]
+                self._inline(circuit.definitions[gate].compiled, ins, outs)
+            else:
+                self._emit(kind, ins, slots[circuit.gate_outputs[gate][0]])
+
+    def _new_slot(self):
+        """Allocate a temporary slot for a partial result"""
+        slot = self.size
+        self.size += 1
+        return slot
+
+    def _emit(self, kind, ins, out):
+        """Append the instructions computing one gate"""
+        emit = self.instructions.append
+
+        if kind == gates.NOT:
+            emit((OP_NOT, ins[0], 0, out) if ins else (OP_CONST, 0, 0, out))
+            return
+        if kind not in _CHAINS or not ins:
+            # Placeholder nodes and gates without inputs behave like ground,
+            # except that an empty AND is vacuously true
+            if kind in (gates.AND, gates.NOR, gates.XNOR) and not ins:
+                emit((OP_NOT, 0, 0, out))
+            else:
+                emit((OP_CONST, 0, 0, out))
+            return
+
+        op, invert = _CHAINS[kind]
+        if len(ins) == 1:
+            emit((OP_NOT if invert else OP_BUF, ins[0], 0, out))
+            return
+
+        acc = ins[0]
+        for slot in ins[1:-1]:
+            partial = self._new_slot()
+            emit((op, acc, slot, partial))
+            acc = partial
+        emit((_INVERTED[op] if invert else op, acc, ins[-1], out))
+
+    def _inline(self, compiled, ins, outs):
+        """Append the instructions of a compiled subcircuit
+
+        Args:
+            compiled: CompiledCircuit of the subcircuit's definition
+            ins: Slots read by the instance's input pins
+            outs: Slots of the instance's output pins
+        """
+        renumbered = dict(zip(compiled.input_slots, ins))
+        renumbered[0] = 0
+        emit = self.instructions.append
+        for op, a, b, out in compiled.instructions:
+            renumbered[out] = self._new_slot()
+            emit((op, renumbered[a], renumbered[b], renumbered[out]))
+        for slot, out in zip(compiled.output_slots, outs):
+            emit((OP_BUF, renumbered[slot], 0, out))
+
+    def run(self, values, mask=1):
+        """Execute the instruction list in place over a list of slot values
+
+        Args:
+            values: List of at least self.size ints, inputs already stored
+            mask: All-ones value of the word width being simulated
+        """
+        for op, a, b, out in self.instructions:
+            if op == OP_AND:
+                values[out] = values[a] & values[b]
+            elif op == OP_OR:
+                values[out] = values[a] | values[b]
+            elif op == OP_XOR:
+                values[out] = values[a] ^ values[b]
+            elif op == OP_NOT:
+                values[out] = mask ^ values[a]
+            elif op == OP_NAND:
+                values[out] = mask ^ (values[a] & values[b])
+            elif op == OP_NOR:
+                values[out] = mask ^ (values[a] | values[b])
+            elif op == OP_XNOR:
+                values[out] = mask ^ values[a] ^ values[b]
+            elif op == OP_BUF:
+                values[out] = values[a]
+            else:
+                values[out] = 0
+        return values
+
+    def function(self):
+        """Generated Python function evaluating this circuit
+
+        See codegen.generate_source for its signature. It is built on first
+        use and is the fast path for evaluating many vectors.
+        """
+        if self._function is None:
+            from src.engine.codegen import generate_function
+            self._function = generate_function(self)
+        return self._function
+
+    def evaluate(self, inputs):
+        """Evaluate one input vector
+
+        Args:
+            inputs: Sequence of input values in the order of self.inputs
+
+        Returns:
+            Tuple of output values in the order of self.outputs
+        """
+        inputs = [1 if value else 0 for value in inputs]
+        return self.function()(*inputs)[:len(self.outputs)]
+
+    def __getstate__(self):
+        # Generated functions cannot be pickled; workers regenerate them
+        state = self.__dict__.copy()
+        state["_function"] = None
+        return state
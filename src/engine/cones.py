@@ -0,0 +1,222 @@
+from src.engine.gates import SOURCE_KINDS, SINK_KINDS, CLOCK_KINDS, SEQUENTIAL_KINDS
+
+# Gates whose value is observed: outputs, and registers whose state is kept
+OBSERVED_KINDS = SINK_KINDS | SEQUENTIAL_KINDS
+
+# Gates that start a cone: inputs and clocks
+ORIGIN_KINDS = SOURCE_KINDS | CLOCK_KINDS
+
+
+def _bits(bitset):
+    """Positions of the set bits of an int"""
+    positions = []
+    while bitset:
+        low = bitset & -bitset
+        positions.append(low.bit_length() - 1)
+        bitset ^= low
+    return positions
+
+
+class ConeIndex:
+    """Reachability index between a circuit's endpoints and its gates
+
+    Every gate keeps two int bitsets: the observed gates (outputs and
+    registers) its value reaches, and the origins (inputs and clocks) that
+    reach it. Questions such as which outputs depend on an input are then a
+    single lookup. Edges through flip-flops count, since the state they
+    load shows up on later clock cycles.
+
+    Adding gates and wires updates the bitsets by spreading only the new
+    bits. Removals may shrink cones, so they mark the index stale and it is
+    rebuilt on the next query.
+    """
+
+    def __init__(self, circuit):
+        self.circuit = circuit
+        self._stale = True
+        self.observed = []
+        self.origins = []
+        self._origin_bits = {}
+        self._reaches = []
+        self._reached_by = []
+
+    def invalidate(self):
+        """Rebuild on next use, after a gate or wire was removed"""
+        self._stale = True
+
+    def _update(self):
+        """Rebuild the bitsets if the index is stale"""
+        if not self._stale:
+            return
+        circuit = self.circuit
+        kinds = circuit.kinds
+        self.observed = []
+        self.origins = []
+        self._origin_bits = {}
+        self._reaches = [0] * len(kinds)
+        self._reached_by = [0] * len(kinds)
+        self._stale = False
+
+        for gate in range(len(kinds)):
+            self._add_endpoint(gate)
+
+        # Components come out readers first, so each one only needs the
+        # finished bitsets of its neighbours outside the component
+        components = self._components()
+        for bitsets, neighbours, order in (
+                (self._reaches, self._readers, components),
+                (self._reached_by, self._drivers, reversed(components))):
+            for component in order:
+                bits = 0
+                for gate in component:
+                    bits |= bitsets[gate]
+                    for other in neighbours(gate):
+                        bits |= bitsets[other]
+                for gate in component:
+                    bitsets[gate] = bits
+
+    def _components(self):
+        """Strongly connected components over every wire, readers first
+
+        Iterative form of Tarjan's algorithm, so that loops through
+        flip-flops and combinational feedback are handled in one pass.
+        """
+        kinds = self.circuit.kinds
+        index = [-1] * len(kinds)
+        low = [0] * len(kinds)
+        on_stack = bytearray(len(kinds))
+        stack = []
+        components = []
+        counter = 0
+
+        for root in range(len(kinds)):
+            if kinds[root] is None or index[root] >= 0:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, iter(self._readers(root)))]
+            while work:
+                gate, readers = work[-1]
+                for reader in readers:
+                    if index[reader] < 0:
+                        index[reader] = low[reader] = counter
+                        counter += 1
+                        stack.append(reader)
+                        on_stack[reader] = 1
+                        work.append((reader, iter(self._readers(reader))))
+                        break
+                    if on_stack[reader]:
+                        low[gate] = min(low[gate], index[reader])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[gate])
+                    if low[gate] == index[gate]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = 0
+                            component.append(member)
+                            if member == gate:
+                                break
+                        components.append(component)
+        return components
+
+    def _add_endpoint(self, gate):
+        """Give an observed or origin gate its own bit"""
+        kind = self.circuit.kinds[gate]
+        if kind in OBSERVED_KINDS:
+            self._reaches[gate] |= 1 << len(self.observed)
+            self.observed.append(gate)
+        if kind in ORIGIN_KINDS:
+            self._origin_bits[gate] = len(self.origins)
+            self._reached_by[gate] |= 1 << len(self.origins)
+            self.origins.append(gate)
+
+    def _drivers(self, gate):
+        """Gates driving any input of a gate"""
+        driver = self.circuit.net_driver
+        return [driver[net] for net in self.circuit.gate_inputs[gate] if driver[net] >= 0]
+
+    def _readers(self, gate):
+        """Gates reading any output of a gate"""
+        fanout = self.circuit.net_fanout
+        return [reader for net in self.circuit.gate_outputs[gate] for reader in fanout[net]]
+
+    def _spread(self, bitsets, neighbours, gate, bits):
+        """OR bits into a gate and onwards until nothing new is added"""
+        stack = [gate]
+        bitsets[gate] |= bits
+        while stack:
+            gate = stack.pop()
+            bits = bitsets[gate]
+            for other in neighbours(gate):
+                merged = bitsets[other] | bits
+                if merged != bitsets[other]:
+                    bitsets[other] = merged
+                    stack.append(other)
+
+    def add_gate(self, gate):
+        """Index a newly added, unconnected gate"""
+        if self._stale:
+            return
+        self._reaches.append(0)
+        self._reached_by.append(0)
+        self._add_endpoint(gate)
+
+    def add_edge(self, src_gate, dst_gate):
+        """Spread cones across a new wire from src_gate to dst_gate"""
+        if self._stale:
+            return
+        reaches = self._reaches[dst_gate]
+        if reaches & ~self._reaches[src_gate]:
+            self._spread(self._reaches, self._drivers, src_gate, reaches)
+        reached_by = self._reached_by[src_gate]
+        if reached_by & ~self._reached_by[dst_gate]:
+            self._spread(self._reached_by, self._readers, dst_gate, reached_by)
+
+    def outputs_of(self, gate):
+        """Output gates whose value depends on a gate"""
+        self._update()
+        kinds = self.circuit.kinds
+        observed = [self.observed[pos] for pos in _bits(self._reaches[gate])]
+        return [other for other in observed if kinds[other] in SINK_KINDS]
+
+    def inputs_of(self, gate):
+        """Input and clock gates a gate's value depends on"""
+        self._update()
+        return [self.origins[pos] for pos in _bits(self._reached_by[gate])]
+
+    def depends(self, gate, origin):
+        """Whether an input or clock gate lies in the fan-in cone of gate"""
+        self._update()
+        pos = self._origin_bits.get(origin)
+        return pos is not None and bool(self._reached_by[gate] >> pos & 1)
+
+    def live_gates(self):
+        """Gates whose value reaches an output or register"""
+        self._update()
+        return set(gate for gate, bits in enumerate(self._reaches)
+                   if bits and self.circuit.kinds[gate] is not None)
+
+    def fanout_cone(self, gate):
+        """Every gate reached from a gate, including itself"""
+        return self._walk(gate, self._readers)
+
+    def fanin_cone(self, gate):
+        """Every gate reaching a gate, including itself"""
+        return self._walk(gate, self._drivers)
+
+    def _walk(self, gate, neighbours):
+        """Gates reachable from a gate in one direction"""
+        seen = {gate}
+        stack = [gate]
+        while stack:
+            for other in neighbours(stack.pop()):
+                if other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        return seen
@@ -0,0 +1,108 @@
+INPUT = "input"
+OUTPUT = "output"
+FILE_OUTPUT = "file_output"
+AND = "and"
+OR = "or"
+NOT = "not"
+NAND = "nand"
+NOR = "nor"
+XOR = "xor"
+XNOR = "xnor"
+CLOCK = "clock"
+DFF = "dff"
+SUBCIRCUIT = "subcircuit"
+DEFAULT = "default"
+
+
+def _and(values, ins, mask=1):
+    """AND of all inputs"""
+    result = mask
+    for net in ins:
+        result &= values[net]
+    return result
+
+def _or(values, ins, mask=1):
+    """OR of all inputs"""
+    result = 0
+    for net in ins:
+        result |= values[net]
+    return result
+
+def _not(values, ins, mask=1):
+    """Inverse of the first input"""
+    if ins:
+        return mask ^ values[ins[0]]
+    return 0
+
+def _nand(values, ins, mask=1):
+    """Inverse of AND"""
+    return mask ^ _and(values, ins, mask)
+
+def _nor(values, ins, mask=1):
+    """Inverse of OR"""
+    return mask ^ _or(values, ins, mask)
+
+def _xor(values, ins, mask=1):
+    """Parity of all inputs"""
+    result = 0
+    for net in ins:
+        result ^= values[net]
+    return result
+
+def _xnor(values, ins, mask=1):
+    """Inverse of XOR"""
+    return mask ^ _xor(values, ins, mask)
+
+def _const(values, ins, mask=1):
+    """Placeholder nodes always drive low"""
+    return 0
+
+
+# Logic functions by gate kind. Values are ints, so the same functions work
+# on single bits and on words of independent bits given a wider mask.
+# Sources (inputs) hold their value on their output net and sinks (outputs)
+# only observe, so neither has an entry here.
+GATE_FUNCTIONS = {
+    AND: _and,
+    OR: _or,
+    NOT: _not,
+    NAND: _nand,
+    NOR: _nor,
+    XOR: _xor,
+    XNOR: _xnor,
+    DEFAULT: _const,
+}
+
+# Default (inputs, outputs) pin counts by gate kind
+GATE_PINS = {
+    INPUT: (0, 1),
+    OUTPUT: (1, 0),
+    FILE_OUTPUT: (1, 0),
+    AND: (2, 1),
+    OR: (2, 1),
+    NOT: (1, 1),
+    NAND: (2, 1),
+    NOR: (2, 1),
+    XOR: (2, 1),
+    XNOR: (2, 1),
+    CLOCK: (0, 1),
+    DFF: (2, 1),
+    SUBCIRCUIT: (0, 0),  # pins come from the subcircuit's definition
+    DEFAULT: (1, 1),
+}
+
+SOURCE_KINDS = frozenset([INPUT])
+SINK_KINDS = frozenset([OUTPUT, FILE_OUTPUT])
+
+# Clocks hold their value like inputs but are not part of the stimulus
+CLOCK_KINDS = frozenset([CLOCK])
+
+# Flip-flops (inputs D, CLK) only change on a rising clock edge, so their
+# inputs never feed combinationally through to their outputs
+SEQUENTIAL_KINDS = frozenset([DFF])
+
+# Kinds that can be wider than one bit, carrying a bus on every pin
+BUS_KINDS = frozenset([INPUT, OUTPUT, AND, OR, NOT, NAND, NOR, XOR, XNOR])
+
+# Widest bus a net can carry
+MAX_BUS_WIDTH = 64
@@ -0,0 +1,282 @@
+from src.engine import gates
+from src.engine.circuit import Circuit
+from src.engine.topology import topological_order, find_feedback
+
+# Underlying operation of each commutative gate kind and whether its result
+# is inverted
+_FORMS = {
+    gates.AND: (gates.AND, False),
+    gates.NAND: (gates.AND, True),
+    gates.OR: (gates.OR, False),
+    gates.NOR: (gates.OR, True),
+    gates.XOR: (gates.XOR, False),
+    gates.XNOR: (gates.XOR, True),
+}
+_KINDS = {form: kind for kind, form in _FORMS.items()}
+
+# Kinds the optimizer rewrites; everything else is copied as drawn
+_FOLDED_KINDS = frozenset(_FORMS) | frozenset([gates.NOT, gates.SUBCIRCUIT, gates.DEFAULT])
+
+# Gates kept whether or not anything reads them: the circuit's inputs,
+# outputs and clocks
+_INTERFACE_KINDS = gates.SOURCE_KINDS | gates.SINK_KINDS | gates.CLOCK_KINDS
+
+
+def optimize(circuit, fixed=None):
+    """Smaller circuit that behaves the same at its inputs and outputs
+
+    Meant to run once before a simulation; the circuit passed in is left
+    as it is. The optimized circuit has the same input, output and clock
+    gates in the same order and with the same names, with everything
+    between them simplified:
+
+    - Constants from unconnected pins and fixed inputs are folded through
+      the gates they reach
+    - Pairs of NOT gates in a row are removed
+    - Gates of the same kind and width reading the same nets, and
+      subcircuits of the same definition, are merged into one
+    - Gates that no output depends on are dropped
+
+    Gates on feedback loops, flip-flops and unknown kinds are copied as
+    they are. A constant 1 is driven by an AND gate with no inputs.
+
+    Args:
+        circuit: Circuit to optimize
+        fixed: Optional mapping of input gate to the value it holds for the
+            whole run. Only these inputs are treated as constants.
+
+    Returns:
+        (optimized circuit, mapping of each kept gate to its new id)
+    """
+    optimizer = _Optimizer(circuit, fixed or {})
+    optimizer.fold()
+    return optimizer.build()
+
+
+class _Optimizer:
+    """Simplifies gates in topological order, then builds what is left"""
+
+    def __init__(self, circuit, fixed):
+        self.circuit = circuit
+        self.fixed = fixed
+        self.loops = set(find_feedback(circuit))
+
+        # Value of every constant net, always 0 or the net's all-ones mask
+        self.constants = {circuit.GROUND: 0}
+
+        # Net that each removed net always carries the value of
+        self.aliases = {}
+
+        # (kind, input nets) of each gate that stays
+        self.kept = {}
+
+        # First kept gate for each (kind, width, inputs)
+        self.seen = {}
+
+    def resolve(self, net):
+        """Net that stays in place of a net"""
+        aliases = self.aliases
+        while net in aliases:
+            net = aliases[net]
+        return net
+
+    def fold(self):
+        """Decide the fate of every gate, drivers before readers"""
+        circuit = self.circuit
+        for gate in topological_order(circuit):
+            kind = circuit.kinds[gate]
+            if kind in gates.SOURCE_KINDS and gate in self.fixed:
+                value = circuit.fit_value(gate, self.fixed[gate])
+                # Other bus values are not constants a gate can drive
+                if value in (0, circuit.masks[gate]):
+                    self._constant(gate, value)
+
+            if kind not in _FOLDED_KINDS or gate in self.loops:
+                self.kept[gate] = (kind, circuit.gate_inputs[gate])
+                continue
+
+            ins = [self.resolve(net) for net in circuit.gate_inputs[gate]]
+            if kind == gates.SUBCIRCUIT:
+                self._fold_subcircuit(gate, ins)
+            elif kind == gates.DEFAULT:
+                self._constant(gate, 0)
+            elif kind == gates.NOT:
+                if ins:
+                    self._invert(gate, ins[0])
+                else:
+                    self._constant(gate, 0)
+            else:
+                self._fold_gate(gate, kind, ins)
+
+    def _constant(self, gate, value):
+        """Make every output of a gate a constant"""
+        for net in self.circuit.gate_outputs[gate]:
+            self.constants[net] = value
+
+    def _alias(self, gate, net):
+        """Make every output of a gate carry another net's value"""
+        for out in self.circuit.gate_outputs[gate]:
+            self.aliases[out] = net
+
+    def _keep(self, gate, kind, ins):
+        """Keep a gate unless an identical one is already kept"""
+        circuit = self.circuit
+        if kind in _FORMS:
+            ins = sorted(ins)
+        if kind == gates.SUBCIRCUIT:
+            key = (kind, id(circuit.definitions[gate]), tuple(ins))
+        else:
+            key = (kind, circuit.masks[gate], tuple(ins))
+
+        first = self.seen.get(key)
+        if first is not None:
+            for out, net in zip(circuit.gate_outputs[gate], circuit.gate_outputs[first]):
+                self.aliases[out] = net
+            return
+
+        self.seen[key] = gate
+        self.kept[gate] = (kind, ins)
+        if kind != gates.SUBCIRCUIT:
+            # Every output of a plain gate carries the same value
+            outs = circuit.gate_outputs[gate]
+            for net in outs[1:]:
+                self.aliases[net] = outs[0]
+
+    def _invert(self, gate, net):
+        """Fold a gate that outputs the inverse of a net"""
+        circuit = self.circuit
+        value = self.constants.get(net)
+        if value is not None:
+            self._constant(gate, circuit.masks[gate] ^ value)
+            return
+
+        driver = circuit.net_driver[net]
+        source = self.kept.get(driver)
+        if source and source[0] == gates.NOT and driver not in self.loops:
+            # NOT of a NOT is the net the first one reads
+            self._alias(gate, source[1][0])
+            return
+
+        self._keep(gate, gates.NOT, [net])
+
+    def _fold_gate(self, gate, kind, ins):
+        """Fold constants and repeated inputs of an AND, OR or XOR form"""
+        mask = self.circuit.masks[gate]
+        base, invert = _FORMS[kind]
+        flip = mask if invert else 0
+
+        # Values that decide the result, and values that drop out
+        absorbing = None if base == gates.XOR else (0 if base == gates.AND else mask)
+        identity = mask if base == gates.AND else 0
+
+        kept = []
+        for net in ins:
+            value = self.constants.get(net)
+            if value is None:
+                kept.append(net)
+            elif value == absorbing:
+                self._constant(gate, absorbing ^ flip)
+                return
+            elif base == gates.XOR and value == mask:
+                # XOR with all ones inverts the rest
+                invert = not invert
+                flip ^= mask
+            elif value != identity:
+                kept.append(net)
+
+        if base == gates.XOR:
+            # Inputs read an even number of times cancel out
+            kept = [net for net in dict.fromkeys(kept) if kept.count(net) % 2]
+        else:
+            kept = list(dict.fromkeys(kept))
+
+        if not kept:
+            self._constant(gate, identity ^ flip)
+        elif len(kept) > 1:
+            self._keep(gate, _KINDS[(base, invert)], kept)
+        elif invert:
+            self._invert(gate, kept[0])
+        else:
+            self._alias(gate, kept[0])
+
+    def _fold_subcircuit(self, gate, ins):
+        """Evaluate a subcircuit with constant inputs, or keep it"""
+        definition = self.circuit.definitions.get(gate)
+        if definition is None:
+            self.kept[gate] = (gates.SUBCIRCUIT, ins)
+        elif all(net in self.constants for net in ins):
+            results = definition.evaluate(self.constants, ins)
+            for net, value in zip(self.circuit.gate_outputs[gate], results):
+                self.constants[net] = value
+        else:
+            self._keep(gate, gates.SUBCIRCUIT, ins)
+
+    def _live_gates(self):
+        """Kept gates that an output or clock depends on"""
+        circuit = self.circuit
+        live = set()
+        stack = [gate for gate in self.kept if circuit.kinds[gate] in _INTERFACE_KINDS]
+        while stack:
+            gate = stack.pop()
+            if gate in live:
+                continue
+            live.add(gate)
+            for net in self.kept[gate][1]:
+                net = self.resolve(net)
+                if net not in self.constants:
+                    stack.append(circuit.net_driver[net])
+        return live
+
+    def build(self):
+        """New circuit of the live kept gates, settled at the current values"""
+        circuit = self.circuit
+        optimized = Circuit()
+        gate_map = {}
+        sources = {}
+        ones = {}
+
+        with optimized.bulk_edit():
+            for gate in sorted(self._live_gates()):
+                kind, ins = self.kept[gate]
+                name = circuit.names[gate]
+                outs = circuit.gate_outputs[gate]
+                if kind == gates.SUBCIRCUIT and gate in circuit.definitions:
+                    copy = optimized.add_subcircuit(circuit.definitions[gate], name)
+                else:
+                    copy = optimized.add_gate(kind, len(ins), len(outs), name)
+                if circuit.masks[gate] != 1:
+                    optimized.set_width([copy], circuit.width(gate))
+                gate_map[gate] = copy
+
+                for pin, net in enumerate(outs):
+                    sources[net] = (copy, pin)
+                    optimized.values[optimized.gate_outputs[copy][pin]] = circuit.values[net]
+                if gate in circuit.clock_levels:
+                    optimized.clock_levels[copy] = circuit.clock_levels[gate]
+                elif kind in gates.SEQUENTIAL_KINDS:
+                    # No edge from the clock level the flip-flop already sees
+                    optimized.clock_levels[copy] = circuit.input_value(gate, 1)
+
+            for gate, copy in list(gate_map.items()):
+                mask = circuit.masks[gate]
+                for pin, net in enumerate(self.kept[gate][1]):
+                    net = self.resolve(net)
+                    value = self.constants.get(net)
+                    if value == 0:
+                        continue
+                    if value is None:
+                        src_gate, src_pin = sources[net]
+                    else:
+                        if mask not in ones:
+                            ones[mask] = optimized.add_gate(gates.AND, 0, 1)
+                            if mask != 1:
+                                optimized.set_width([ones[mask]], mask.bit_length())
+                        src_gate, src_pin = ones[mask], 0
+                    optimized.connect(src_gate, src_pin, copy, pin)
+
+            for gate, value in self.fixed.items():
+                if gate in gate_map:
+                    optimized.drive(gate_map[gate], value)
+
+        optimized.propagate(optimized.gates())
+        return optimized, gate_map
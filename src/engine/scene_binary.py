@@ -0,0 +1,233 @@
+import gc
+import json
+import struct
+import sys
+
+from src.engine.scene_file import socket_values, connection_fields
+
+# Binary circuit files start with this magic, followed by the header
+MAGIC = b"LGSB"
+VERSION = 3
+
+# Versions this module reads. Version 1 has no value size in the header
+# and stores every socket value in one byte. Versions before 3 store
+# socket counts in one byte.
+READ_VERSIONS = (1, 2, 3)
+
+# magic, version, bytes per socket value, node count, connection count,
+# string count
+HEADER = struct.Struct("<4sHBxIII")
+
+# String index stored for a missing title or empty properties
+NO_STRING = 0xFFFFFFFF
+
+
+def is_binary_scene(path):
+    """True if the file at path is a binary circuit file"""
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def _array(code, values):
+    """Pack a sequence as a little-endian array"""
+    return struct.pack(f"<{len(values)}{code}", *values)
+
+
+def _unpack_counts(view, offset, count):
+    """Little-endian uint32 array of count items at offset"""
+    if sys.byteorder != "little":
+        return struct.unpack_from(f"<{count}I", view, offset)
+    chunk = view[offset:offset + 4 * count]
+    if len(chunk) != 4 * count:
+        raise struct.error("socket counts run past the end of the data")
+    return chunk.cast("I")
+
+
+def encode_scene(data):
+    """Pack editor scene data into the binary circuit format
+
+    The layout after the header is, all little-endian:
+
+        string lengths     uint32[strings], then the UTF-8 bytes of each
+        node types         uint32[nodes], index into the string table
+        node titles        uint32[nodes], string index or NO_STRING
+        node properties    uint32[nodes], string index of the properties as
+                           JSON, or NO_STRING when there are none
+        positions          float64[2 * nodes], x then y of each node
+        socket counts      uint32[nodes] inputs, then uint32[nodes] outputs
+        socket values      one per socket, node by node, inputs first; uint8
+                           unless a bus value needs the header's uint64
+        connections        uint32[4 * connections], start node index,
+                           start socket, end node index, end socket
+
+    Nodes are referred to by their position in the node list, so saved
+    node ids are not stored.
+    """
+    strings = {}
+
+    def intern(text):
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    nodes = data["nodes"]
+    index_of = {}
+    types = []
+    titles = []
+    properties = []
+    positions = []
+    input_counts = []
+    output_counts = []
+    values = []
+
+    for index, node in enumerate(nodes):
+        index_of[node["id"]] = index
+        types.append(intern(node["type"]))
+        title = node.get("title")
+        titles.append(NO_STRING if title is None else intern(title))
+        props = node.get("properties")
+        properties.append(intern(json.dumps(props, separators=(",", ":"))) if props else NO_STRING)
+        positions += (node["pos_x"], node["pos_y"])
+        input_counts.append(len(node["inputs"]))
+        output_counts.append(len(node["outputs"]))
+        values += map(int, socket_values(node["inputs"]))
+        values += map(int, socket_values(node["outputs"]))
+
+    edges = []
+    for connection in data["connections"]:
+        start_node, start_socket, end_node, end_socket = connection_fields(connection)
+        start = index_of.get(start_node)
+        end = index_of.get(end_node)
+        if start is not None and end is not None:
+            edges += (start, start_socket, end, end_socket)
+
+    value_size = 1 if max(values, default=0) < 256 else 8
+    encoded = [text.encode("utf-8") for text in strings]
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, value_size, len(nodes), len(edges) // 4, len(encoded)),
+        _array("I", [len(text) for text in encoded]),
+        *encoded,
+        _array("I", types),
+        _array("I", titles),
+        _array("I", properties),
+        _array("d", positions),
+        _array("I", input_counts),
+        _array("I", output_counts),
+        bytes(values) if value_size == 1 else _array("Q", values),
+        _array("I", edges),
+    ))
+
+
+def decode_scene(buffer):
+    """Unpack binary circuit data into editor scene data
+
+    Returns scene data in the form current JSON files hold, with nodes
+    numbered from 0, plain socket values and connection tuples.
+
+    Raises:
+        ValueError: If the data is not a binary circuit this version reads
+    """
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        raise ValueError("Binary circuit file is truncated")
+    magic, version, value_size, n_nodes, n_edges, n_strings = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a binary circuit file")
+    if version not in READ_VERSIONS:
+        raise ValueError(f"Unsupported binary circuit version {version}")
+    if version == 1:
+        value_size = 1
+    if value_size not in (1, 8):
+        raise ValueError(f"Unsupported socket value size {value_size}")
+
+    try:
+        offset = HEADER.size
+        lengths = struct.unpack_from(f"<{n_strings}I", view, offset)
+        offset += 4 * n_strings
+        strings = []
+        for length in lengths:
+            strings.append(str(view[offset:offset + length], "utf-8"))
+            offset += length
+
+        types = struct.unpack_from(f"<{n_nodes}I", view, offset)
+        offset += 4 * n_nodes
+        titles = struct.unpack_from(f"<{n_nodes}I", view, offset)
+        offset += 4 * n_nodes
+        properties = struct.unpack_from(f"<{n_nodes}I", view, offset)
+        offset += 4 * n_nodes
+        positions = struct.unpack_from(f"<{2 * n_nodes}d", view, offset)
+        offset += 16 * n_nodes
+        if version < 3:
+            count_size = 1
+            input_counts = view[offset:offset + n_nodes]
+            output_counts = view[offset + n_nodes:offset + 2 * n_nodes]
+        else:
+            count_size = 4
+            input_counts = _unpack_counts(view, offset, n_nodes)
+            output_counts = _unpack_counts(view, offset + 4 * n_nodes, n_nodes)
+        offset += 2 * count_size * n_nodes
+        n_values = sum(input_counts) + sum(output_counts)
+        if value_size == 1:
+            values = view[offset:offset + n_values]
+        else:
+            values = struct.unpack_from(f"<{n_values}Q", view, offset)
+        offset += n_values * value_size
+        edges = struct.unpack_from(f"<{4 * n_edges}I", view, offset)
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"Binary circuit file is truncated: {e}") from e
+
+    # Property dicts are decoded once per distinct string. The collector
+    # is paused while the dicts are built; none of them form cycles.
+    decoded = {}
+    nodes = []
+    value = 0
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for index in range(n_nodes):
+            sockets = []
+            for count in (input_counts[index], output_counts[index]):
+                sockets.append(list(values[value:value + count]))
+                value += count
+
+            props = properties[index]
+            if props == NO_STRING:
+                props = {}
+            else:
+                if props not in decoded:
+                    decoded[props] = json.loads(strings[props])
+                props = dict(decoded[props])
+
+            node = {
+                "id": index,
+                "type": strings[types[index]],
+                "pos_x": positions[2 * index],
+                "pos_y": positions[2 * index + 1],
+                "inputs": sockets[0],
+                "outputs": sockets[1],
+                "properties": props,
+            }
+            if titles[index] != NO_STRING:
+                node["title"] = strings[titles[index]]
+            nodes.append(node)
+
+        connections = [edges[index:index + 4] for index in range(0, len(edges), 4)]
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"Binary circuit file is corrupt: {e}") from e
+    finally:
+        if collecting:
+            gc.enable()
+    return {"nodes": nodes, "connections": connections}
+
+
+def write_binary_scene(path, data):
+    """Save editor scene data as a binary circuit file"""
+    with open(path, "wb") as file:
+        file.write(encode_scene(data))
+
+
+def read_binary_scene(path):
+    """Load editor scene data from a binary circuit file"""
+    with open(path, "rb") as file:
+        return decode_scene(file.read())
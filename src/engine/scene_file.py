@@ -0,0 +1,207 @@
+import json
+import os
+
+from src.engine import gates
+from src.engine.circuit import Circuit
+
+# Version written to JSON files. Version 1 files have no version field,
+# keep a dict with an object id per socket and key connections by name.
+FORMAT_VERSION = 2
+
+# Gate kind of each node type as saved by the editor. Files store the node
+# class name; the factory keys (the kinds themselves) are accepted as well.
+NODE_KINDS = {
+    "InputNode": gates.INPUT,
+    "OutputNode": gates.OUTPUT,
+    "FileOutputNode": gates.FILE_OUTPUT,
+    "AndNode": gates.AND,
+    "OrNode": gates.OR,
+    "NotNode": gates.NOT,
+    "NandNode": gates.NAND,
+    "NorNode": gates.NOR,
+    "XorNode": gates.XOR,
+    "XnorNode": gates.XNOR,
+    "ClockNode": gates.CLOCK,
+    "DffNode": gates.DFF,
+    "SubcircuitNode": gates.SUBCIRCUIT,
+    "Node": gates.DEFAULT,
+}
+
+# Titles the editor gives each kind of node
+TITLES = {
+    gates.INPUT: "Input",
+    gates.OUTPUT: "Output",
+    gates.FILE_OUTPUT: "Write Output",
+    gates.AND: "AND",
+    gates.OR: "OR",
+    gates.NOT: "NOT",
+    gates.NAND: "NAND",
+    gates.NOR: "NOR",
+    gates.XOR: "XOR",
+    gates.XNOR: "XNOR",
+    gates.CLOCK: "Clock",
+    gates.DFF: "D Flip-Flop",
+    gates.SUBCIRCUIT: "Subcircuit",
+    gates.DEFAULT: "Default Node",
+}
+
+
+def _field(record, key, what):
+    """Required field of a saved record
+
+    Raises:
+        ValueError: If the record does not have the field
+    """
+    try:
+        return record[key]
+    except (KeyError, TypeError):
+        raise ValueError(f"Saved {what} has no '{key}' field") from None
+
+
+def node_kind(node_type):
+    """Gate kind for a saved node type, DEFAULT if it is unknown"""
+    kind = NODE_KINDS.get(node_type)
+    if kind is None:
+        kind = node_type if node_type in gates.GATE_PINS else gates.DEFAULT
+    return kind
+
+
+def socket_values(sockets):
+    """Values of a saved node's sockets, from either format version"""
+    return [_field(socket, "value", "socket") if isinstance(socket, dict) else socket
+            for socket in sockets]
+
+
+def connection_fields(connection):
+    """(start_node, start_socket, end_node, end_socket) of a saved connection"""
+    if isinstance(connection, dict):
+        return tuple(_field(connection, key, "connection")
+                     for key in ("start_node", "start_socket", "end_node", "end_socket"))
+    return tuple(connection)
+
+
+def load_scene_data(path):
+    """Read the scene data dict of a JSON or binary circuit file"""
+    from src.engine.scene_binary import is_binary_scene, read_binary_scene
+    if is_binary_scene(path):
+        return read_binary_scene(path)
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def write_scene_json(file, nodes, connections):
+    """Stream scene data to a text file as JSON
+
+    Each node and connection is encoded and written on its own line as it
+    comes, so the document never exists in memory as a whole.
+
+    Args:
+        nodes: Iterable of node dicts whose "inputs" and "outputs" hold
+            plain socket values
+        connections: Iterable of (start_node, start_socket, end_node,
+            end_socket) tuples, with nodes given by their "id"
+    """
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    write = file.write
+    write(f'{{"version":{FORMAT_VERSION},\n"nodes":[')
+    separator = "\n"
+    for node in nodes:
+        write(separator)
+        write(encode(node))
+        separator = ",\n"
+    write('\n],\n"connections":[')
+    separator = "\n"
+    for start_node, start_socket, end_node, end_socket in connections:
+        write(f"{separator}[{start_node},{start_socket},{end_node},{end_socket}]")
+        separator = ",\n"
+    write("\n]}\n")
+
+
+def save_scene(path, nodes, connections):
+    """Save scene data, in the binary format for .lgsb paths and JSON otherwise
+
+    The file is written next to its destination and moved into place at
+    the end, so a failed save leaves any previous file intact.
+    """
+    temp_path = path + ".tmp"
+    try:
+        if path.endswith(".lgsb"):
+            from src.engine.scene_binary import write_binary_scene
+            write_binary_scene(temp_path, {"nodes": list(nodes), "connections": list(connections)})
+        else:
+            with open(temp_path, "w") as file:
+                write_scene_json(file, nodes, connections)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def circuit_from_scene(data, base_dir=""):
+    """Build a headless Circuit from editor scene data
+
+    Nodes are added top to bottom, then left to right, so inputs and
+    outputs come in the order they appear on screen. Inputs start at the
+    value saved on their output socket. Bus nodes save their width as the
+    "width" property; wires between pins of different widths are dropped.
+
+    Args:
+        base_dir: Directory that relative subcircuit paths start from
+
+    Raises:
+        OSError: If a subcircuit file cannot be read
+        ValueError: If a node or connection is missing a field or has an
+            invalid type, or a subcircuit file is not a valid subcircuit
+
+    Returns:
+        (circuit, gates) where gates maps saved node ids to gate ids
+    """
+    nodes = sorted(_field(data, "nodes", "circuit"),
+                   key=lambda node: (_field(node, "pos_y", "node"), _field(node, "pos_x", "node")))
+    circuit = Circuit()
+    gate_ids = {}
+    driven = {}
+
+    with circuit.bulk_edit():
+        for node in nodes:
+            node_type = _field(node, "type", "node")
+            if not isinstance(node_type, str):
+                raise ValueError(f"Saved node has an invalid type {node_type!r}")
+            kind = node_kind(node_type)
+            title = node.get("title") or TITLES.get(kind, kind)
+            if kind == gates.SUBCIRCUIT:
+                from src.engine.subcircuit import load_definition
+                path = os.path.join(base_dir, node.get("properties", {}).get("path", ""))
+                gate = circuit.add_subcircuit(load_definition(path), title)
+            else:
+                gate = circuit.add_gate(kind, len(_field(node, "inputs", "node")),
+                                        len(_field(node, "outputs", "node")), title)
+            width = node.get("properties", {}).get("width", 1)
+            if width != 1:
+                circuit.set_width([gate], width)
+            gate_ids[_field(node, "id", "node")] = gate
+            if kind in gates.SOURCE_KINDS or kind in gates.CLOCK_KINDS:
+                outputs = socket_values(_field(node, "outputs", "node"))
+                driven[gate] = outputs[0] if outputs else 0
+
+        for connection in _field(data, "connections", "circuit"):
+            start_node, start_socket, end_node, end_socket = connection_fields(connection)
+            src = gate_ids.get(start_node)
+            dst = gate_ids.get(end_node)
+            if src is None or dst is None:
+                continue
+            if (start_socket < len(circuit.gate_outputs[src]) and
+                    end_socket < len(circuit.gate_inputs[dst]) and
+                    circuit.masks[src] == circuit.masks[dst]):
+                circuit.connect(src, start_socket, dst, end_socket)
+
+    for gate, value in driven.items():
+        circuit.drive(gate, value)
+    circuit.propagate(circuit.gates())
+    return circuit, gate_ids
+
+
+def load_circuit(path):
+    """Load a circuit file into a headless Circuit"""
+    circuit, _ = circuit_from_scene(load_scene_data(path), os.path.dirname(path))
+    return circuit
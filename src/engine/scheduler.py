@@ -0,0 +1,172 @@
+from heapq import heapify, heappop, heappush
+
+from src.engine.gates import SEQUENTIAL_KINDS
+from src.engine.topology import levelize, successors
+
+
+class OscillationError(RuntimeError):
+    """Raised when feedback keeps a circuit from settling
+
+    Attributes:
+        gates: Sorted ids of the gates that kept changing
+        changed: Nets that changed before propagation gave up
+    """
+
+    def __init__(self, message, gates, changed):
+        super().__init__(message)
+        self.gates = gates
+        self.changed = changed
+
+
+class EventScheduler:
+    """Levelized worklist propagation over a Circuit
+
+    Affected gates are evaluated in rank order, so each one runs at most once
+    per change however many of its inputs moved, and propagation stops at
+    gates whose outputs did not change. Readers ranked at or before the gate
+    that woke them close a feedback loop and wait for the next delta cycle.
+
+    Feedback circuits such as latches settle within a few delta cycles. If
+    the state of the changed nets repeats, the circuit oscillates and can
+    never settle; that, or running out of delta cycles, raises
+    OscillationError naming the gates involved.
+    """
+
+    # Delta cycles allowed per run before giving up on settling
+    max_delta_cycles = 1000
+
+    def __init__(self, circuit):
+        self.circuit = circuit
+        self._rank = []
+        self._stale = True
+
+    def ranks(self):
+        """Gate ranks, kept up to date incrementally by add_edge
+
+        Removing gates or wires never breaks the order, and new gates start
+        unconnected at rank 0, so only a full rebuild after a wire closed a
+        feedback loop costs time proportional to the circuit.
+        """
+        rank = self._rank
+        if self._stale:
+            rank = self._rank = levelize(self.circuit)
+            self._stale = False
+        elif len(rank) < len(self.circuit.kinds):
+            rank.extend([0] * (len(self.circuit.kinds) - len(rank)))
+        return rank
+
+    def invalidate(self):
+        """Rebuild the ranks on next use"""
+        self._stale = True
+
+    def add_edge(self, src_gate, dst_gate):
+        """Keep ranks ordered after a wire from src_gate to dst_gate
+
+        Raises the ranks of dst_gate and its fan-out cone just enough to
+        stay after src_gate. If that reaches src_gate again the wire closed
+        a loop, and the ranks are rebuilt on next use.
+        """
+        if self._stale or self.circuit.kinds[dst_gate] in SEQUENTIAL_KINDS:
+            return
+        circuit = self.circuit
+        rank = self.ranks()
+        if rank[src_gate] < rank[dst_gate]:
+            return
+
+        # Loops that already exist would be raised around forever, so give
+        # up once more gates were raised than the circuit holds
+        budget = len(rank)
+        rank[dst_gate] = rank[src_gate] + 1
+        stack = [dst_gate]
+        while stack:
+            gate = stack.pop()
+            level = rank[gate]
+            for reader in successors(circuit, gate):
+                if rank[reader] > level:
+                    continue
+                budget -= 1
+                if reader == src_gate or budget < 0:
+                    self._stale = True
+                    return
+                rank[reader] = level + 1
+                stack.append(reader)
+
+    def run(self, gates, changed=None):
+        """Evaluate gates and everything downstream of a change
+
+        Args:
+            gates: Gates to evaluate first
+            changed: Optional set to collect changed nets into
+
+        Returns:
+            Set of nets whose value changed
+        """
+        circuit = self.circuit
+        kinds = circuit.kinds
+        values = circuit.values
+        fanout = circuit.net_fanout
+        evaluate = circuit.evaluate
+        rank = self.ranks()
+        if changed is None:
+            changed = set()
+
+        woken = set(gate for gate in gates if kinds[gate] is not None)
+        seen_states = {}
+        history = []
+        while woken:
+            pending = [(rank[gate], gate) for gate in woken]
+            heapify(pending)
+            queued = woken
+            woken = set()
+            moved = []
+
+            while pending:
+                level, gate = heappop(pending)
+                nets = evaluate(gate)
+                if not nets:
+                    continue
+                moved.append(gate)
+                for net in nets:
+                    changed.add(net)
+                    for reader in fanout[net]:
+                        reader_rank = rank[reader]
+                        if reader_rank <= level:
+                            woken.add(reader)
+                        elif reader not in queued:
+                            queued.add(reader)
+                            heappush(pending, (reader_rank, reader))
+
+            if not woken:
+                break
+
+            # Another delta cycle is needed, so check for a repeated state
+            history.append(moved)
+            state = hash(tuple(values[net] for net in sorted(changed)))
+            first = seen_states.get(state)
+            if first is not None:
+                self._notify(changed)
+                raise self._oscillation(
+                    f"Circuit oscillates with a period of {len(history) - first} delta cycles",
+                    history[first:], changed
+                )
+            seen_states[state] = len(history)
+
+            if len(history) >= self.max_delta_cycles:
+                self._notify(changed)
+                raise self._oscillation(
+                    f"Circuit did not settle within {self.max_delta_cycles} delta cycles",
+                    history, changed
+                )
+
+        self._notify(changed)
+        return changed
+
+    def _notify(self, changed):
+        """Pass the nets a run changed to the circuit's observers"""
+        for observer in self.circuit.observers:
+            observer(changed)
+
+    def _oscillation(self, message, history, changed):
+        """Build the error for gates that kept changing"""
+        gates = sorted(set(gate for moved in history for gate in moved))
+        return OscillationError(message, gates, changed)
@@ -0,0 +1,74 @@
+class CycleSimulator:
+    """Cycle-based simulation of a synchronous circuit
+
+    Every flip-flop is treated as clocked by one global clock. A cycle
+    samples the D input of every register, loads them all at once and
+    evaluates the combinational logic one time with the circuit's generated
+    function, which is far cheaper than propagating clock events.
+
+    Args:
+        circuit: Circuit to simulate; inputs and registers start from its
+            current values
+    """
+
+    def __init__(self, circuit):
+        self.compiled = circuit.compile()
+        self.cycle = 0
+
+        compiled = self.compiled
+        self._function = compiled.function()
+        self._n_outputs = len(compiled.outputs)
+        self._inputs = [circuit.output_value(gate) for gate in compiled.inputs]
+        self._state = [circuit.output_value(gate) for gate in compiled.registers]
+        self._result = self._function(*self._inputs, *self._state)
+
+    def set_inputs(self, inputs):
+        """Drive the inputs, in the order of compiled.inputs"""
+        self._inputs = [1 if value else 0 for value in inputs]
+        self._result = self._function(*self._inputs, *self._state)
+
+    def run(self, cycles=1):
+        """Advance the given number of clock cycles
+
+        Returns:
+            Output values after the last cycle
+        """
+        function = self._function
+        inputs = self._inputs
+        n_outputs = self._n_outputs
+        state = self._state
+        result = self._result
+
+        # Each evaluation yields the outputs and the next register state
+        for _ in range(cycles):
+            state = result[n_outputs:]
+            result = function(*inputs, *state)
+
+        self._state = list(state)
+        self._result = result
+        self.cycle += cycles
+        return self.outputs()
+
+    def outputs(self):
+        """Current output values, in the order of compiled.outputs"""
+        return self._result[:self._n_outputs]
+
+    def state(self):
+        """Current register values, in the order of compiled.registers"""
+        return tuple(self._state)
+
+    def store(self, circuit):
+        """Copy the register state back into the circuit and propagate it
+
+        Returns:
+            Set of nets whose value changed
+        """
+        readers = []
+        changed = set()
+        for gate, value in zip(self.compiled.registers, self.state()):
+            net = circuit.gate_outputs[gate][0]
+            if circuit.values[net] != value:
+                circuit.values[net] = value
+                changed.add(net)
+                readers.extend(circuit.net_fanout[net])
+        return circuit.scheduler.run(readers, changed)
@@ -0,0 +1,202 @@
+import csv
+
+from src.engine.gates import SOURCE_KINDS, CLOCK_KINDS
+
+
+def _parse_bits(fields, line):
+    """Row of 0/1 ints from text fields"""
+    try:
+        return tuple(1 if int(field) else 0 for field in fields)
+    except ValueError:
+        raise ValueError(f"Line {line}: expected 0 or 1 values, got {fields}")
+
+
+def parse_value(text):
+    """Integer written in decimal, or in hex or binary with a 0x/0b prefix
+
+    Unlike int(text, 0), decimal values may have leading zeros.
+
+    Raises:
+        ValueError: If the text is not an integer
+    """
+    text = text.strip()
+    if text.lstrip("+-")[:2].lower() in ("0x", "0b"):
+        return int(text, 0)
+    return int(text, 10)
+
+
+def parse_vector(text, widths):
+    """Input values from one typed vector
+
+    A vector is a bit string such as 0101 or 01_01, one bit per input, or
+    comma-separated values such as 1,0xF0,0 as parse_value reads them.
+    Circuits with bus inputs always take values.
+
+    Args:
+        widths: Bit width of each input, in order
+
+    Raises:
+        ValueError: If the vector does not give one fitting value per input
+    """
+    if "," not in text and all(width == 1 for width in widths):
+        bits = text.replace("_", "").replace(" ", "")
+        if len(bits) != len(widths) or set(bits) - set("01"):
+            raise ValueError(f"Vector '{text}' must be {len(widths)} bits of 0 or 1")
+        return tuple(int(bit) for bit in bits)
+
+    fields = text.split(",")
+    if len(fields) != len(widths):
+        raise ValueError(
+            f"Vector '{text}' must be {len(widths)} comma-separated values, got {len(fields)}"
+        )
+    values = []
+    for field, width in zip(fields, widths):
+        try:
+            value = parse_value(field)
+        except ValueError:
+            raise ValueError(f"Vector '{text}': '{field.strip()}' is not an integer") from None
+        if not 0 <= value < 1 << width:
+            raise ValueError(f"Vector '{text}': {field.strip()} does not fit a {width}-bit input")
+        values.append(value)
+    return tuple(values)
+
+
+def _parse_values(fields, line):
+    """Row of ints from CSV fields, see parse_value"""
+    try:
+        return tuple(parse_value(field) for field in fields)
+    except ValueError:
+        raise ValueError(f"Line {line}: expected integer values, got {fields}")
+
+
+def _strip_bits(text):
+    """Bits of a bit-string line without comments and separators"""
+    return text.split("#")[0].strip().replace("_", "").replace(" ", "")
+
+
+def _csv_rows(file, reader, width):
+    """Rows of a CSV stimulus after its header"""
+    with file:
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != width:
+                raise ValueError(
+                    f"Line {reader.line_num}: expected {width} values, got {len(row)}"
+                )
+            yield _parse_values(row, reader.line_num)
+
+
+def _bit_rows(file, first, first_line, width):
+    """Rows of a bit-string stimulus, starting with a row already read from first_line"""
+    with file:
+        yield first
+        for line, text in enumerate(file, first_line + 1):
+            bits = _strip_bits(text)
+            if not bits:
+                continue
+            if len(bits) != width:
+                raise ValueError(f"Line {line}: expected {width} bits, got {len(bits)}")
+            yield _parse_bits(bits, line)
+
+
+def open_stimulus(path):
+    """Open a stimulus file for streaming
+
+    CSV files (.csv) start with a header of input titles followed by one row
+    of values per step: 0 or 1, or an integer for bus inputs. Any other file
+    holds one bit string per line, in the order of the circuit's inputs;
+    spaces, underscores, blank lines and # comments are ignored.
+
+    Returns:
+        (columns, rows) where columns is the list of titles, or None for
+        bit strings, and rows lazily yields one tuple of ints per step
+    """
+    file = open(path, newline="")
+    try:
+        if path.lower().endswith(".csv"):
+            reader = csv.reader(file)
+            columns = [title.strip() for title in next(reader, [])]
+            return columns, _csv_rows(file, reader, len(columns))
+
+        for line, text in enumerate(file, 1):
+            bits = _strip_bits(text)
+            if bits:
+                return None, _bit_rows(file, _parse_bits(bits, line), line, len(bits))
+        file.close()
+        return None, iter(())
+    except Exception:
+        file.close()
+        raise
+
+
+def bind_inputs(circuit, columns, order=None):
+    """Input gates driven by each stimulus column
+
+    Columns are matched to input and clock gates by title. Several gates may
+    share a title, so each column takes the first unused gate with its title.
+
+    Args:
+        columns: Column titles, or None to drive every input in order
+        order: Gates in the order columns claim them, defaults to the order
+            they were added. Scenes pass their nodes top to bottom, then
+            left to right, the order saved files load in.
+    """
+    if order is None:
+        order = circuit.gates()
+    if columns is None:
+        return [gate for gate in order if circuit.kinds[gate] in SOURCE_KINDS]
+
+    candidates = {}
+    for gate in order:
+        if circuit.kinds[gate] in SOURCE_KINDS or circuit.kinds[gate] in CLOCK_KINDS:
+            candidates.setdefault(circuit.names[gate], []).append(gate)
+
+    gates = []
+    for title in columns:
+        matches = candidates.get(title)
+        if not matches:
+            raise ValueError(f"No input titled '{title}' left for stimulus column")
+        gates.append(matches.pop(0))
+    return gates
+
+
+def play(circuit, gates, rows):
+    """Drive the circuit one row at a time
+
+    Each row is applied as a single transaction, so it propagates once.
+
+    Yields:
+        Output values after each step, in the order of circuit.output_gates()
+    """
+    outputs = circuit.output_gates()
+    values = circuit.values
+    nets = [circuit.gate_inputs[gate][0] if circuit.gate_inputs[gate] else circuit.GROUND
+            for gate in outputs]
+    set_inputs = circuit.set_inputs
+    for step, row in enumerate(rows, 1):
+        if len(row) != len(gates):
+            raise ValueError(f"Step {step}: expected {len(gates)} inputs, got {len(row)}")
+        set_inputs(dict(zip(gates, row)))
+        yield tuple(values[net] for net in nets)
+
+
+def run_stimulus(circuit, path, out_path):
+    """Stream a stimulus file through a circuit into an output CSV
+
+    Rows are read, simulated and written one at a time, so memory use does
+    not grow with the length of the stimulus.
+
+    Returns:
+        Number of steps run
+    """
+    columns, rows = open_stimulus(path)
+    gates = bind_inputs(circuit, columns)
+    steps = 0
+    with open(out_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow([circuit.names[gate] or f"output{gate}" for gate in circuit.output_gates()])
+        for values in play(circuit, gates, rows):
+            writer.writerow(values)
+            steps += 1
+    return steps
@@ -0,0 +1,80 @@
+import os
+
+from src.engine import gates
+
+# Loaded definitions by absolute path, with the file's modification time
+_definitions = {}
+
+# Paths whose definitions are being loaded, to catch files that include
+# themselves
+_loading = set()
+
+
+class SubcircuitDefinition:
+    """Compiled circuit shared by every instance of a subcircuit
+
+    Instances are single gates whose input pins are the circuit's inputs and
+    whose output pins are its outputs, in on-screen order. They all evaluate
+    through the one generated function built here, so a definition costs
+    the same however many instances use it.
+
+    Args:
+        circuit: Combinational circuit to wrap
+        name: Title for instances
+        path: File the circuit was loaded from, if any
+
+    Raises:
+        ValueError: If the circuit has feedback, flip-flops or clocks
+    """
+
+    def __init__(self, circuit, name="", path=None):
+        if any(kind in gates.SEQUENTIAL_KINDS or kind in gates.CLOCK_KINDS
+               for kind in circuit.kinds):
+            raise ValueError("Subcircuits cannot contain flip-flops or clocks")
+
+        self.compiled = circuit.compile()
+        self.name = name
+        self.path = path
+        self.inputs = [self.compiled.names[gate] for gate in self.compiled.inputs]
+        self.outputs = [self.compiled.names[gate] for gate in self.compiled.outputs]
+        self.function = self.compiled.function()
+
+    def evaluate(self, values, ins, mask=1):
+        """Outputs of an instance whose input pins read the nets ins
+
+        Takes the same arguments as the functions in gates.GATE_FUNCTIONS,
+        but returns a tuple with one value per output pin.
+        """
+        return self.function(*[values[net] for net in ins], m=mask)
+
+
+def load_definition(path):
+    """Definition of the circuit file at path
+
+    Every instance of a file shares one definition, which is loaded again
+    only once the file has changed.
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a valid subcircuit
+    """
+    from src.engine.scene_file import circuit_from_scene, load_scene_data
+
+    path = os.path.abspath(path)
+    modified = os.path.getmtime(path)
+    cached = _definitions.get(path)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+
+    if path in _loading:
+        raise ValueError(f"Subcircuit {path} includes itself")
+    _loading.add(path)
+    try:
+        circuit, _ = circuit_from_scene(load_scene_data(path), os.path.dirname(path))
+        name = os.path.splitext(os.path.basename(path))[0]
+        definition = SubcircuitDefinition(circuit, name, path)
+    finally:
+        _loading.discard(path)
+
+    _definitions[path] = (modified, definition)
+    return definition
@@ -0,0 +1,220 @@
+from heapq import heappop, heappush
+
+from src.engine import gates
+from src.engine.gates import GATE_FUNCTIONS, SEQUENTIAL_KINDS, SUBCIRCUIT
+
+# Propagation delay of each gate kind, in simulation time units
+DEFAULT_DELAYS = {
+    gates.NOT: 1,
+    gates.NAND: 1,
+    gates.NOR: 1,
+    gates.AND: 2,
+    gates.OR: 2,
+    gates.XOR: 3,
+    gates.XNOR: 3,
+    gates.DFF: 2,
+    gates.DEFAULT: 1,
+}
+
+
+class TimingSimulator:
+    """Event-driven simulation with per-gate propagation delays
+
+    Net changes are queued on a timing wheel: a heap of pending times, each
+    with a bucket of (net, value) events. All changes due at one time are
+    applied together, every gate they reach is evaluated once, and its new
+    output is scheduled after the gate's delay (transport delay). Short
+    pulses are kept, so glitches and hazards show up in the trace. Changes
+    of one net at a single time, including those from zero-delay gates,
+    are merged and reported once, so every pulse has a width.
+
+    The simulator works on its own copy of the circuit's values, so the
+    zero-delay state of the circuit is left untouched.
+
+    Args:
+        circuit: Circuit to simulate, starting from its current values
+        delays: Optional mapping of gate kind to delay, overriding
+            DEFAULT_DELAYS
+    """
+
+    def __init__(self, circuit, delays=None):
+        self.circuit = circuit
+        self.delays = dict(DEFAULT_DELAYS)
+        if delays:
+            self.delays.update(delays)
+
+        self.time = 0
+        self.values = circuit.values[:]
+        self.events = 0
+
+        # Last value scheduled for each net, to drop redundant events
+        self._projected = self.values[:]
+        self._clock_levels = dict(circuit.clock_levels)
+        self._times = []
+        self._buckets = {}
+        self._listeners = []
+        self._plan_cache = None
+        self._plan_version = None
+
+    def watch(self, callback):
+        """Call callback(time, net, value) for every net that changes
+
+        Each net is reported at most once per time, with its final value.
+        """
+        self._listeners.append(callback)
+
+    def schedule(self, net, value, time):
+        """Queue a net change at an absolute time"""
+        bucket = self._buckets.get(time)
+        if bucket is None:
+            bucket = self._buckets[time] = []
+            heappush(self._times, time)
+        bucket.append((net, value))
+        self._projected[net] = value
+
+    def set_input(self, gate, value, delay=0):
+        """Drive a source or clock gate, delay time units from now"""
+        value = self.circuit.fit_value(gate, value)
+        self._plans()
+        for net in self.circuit.gate_outputs[gate]:
+            self.schedule(net, value, self.time + delay)
+
+    def pending(self):
+        """Whether any events are still queued"""
+        return bool(self._times)
+
+    def run(self, until=None):
+        """Process events in time order
+
+        Args:
+            until: Stop before events later than this time; runs until the
+                circuit is quiet by default
+
+        Returns:
+            Number of net changes reported
+        """
+        plans = self._plans()
+        values = self.values
+        projected = self._projected
+        fanout = self.circuit.net_fanout
+        times = self._times
+        buckets = self._buckets
+        listeners = self._listeners
+        applied = 0
+
+        # Value each net had before the current time, for nets changed at it
+        before = {}
+
+        while times and (until is None or times[0] <= until):
+            now = heappop(times)
+            if now != self.time:
+                applied += self._report(before, listeners)
+            self.time = now
+            bucket = buckets.pop(now)
+
+            # Apply every change due now, the last one per net winning, then
+            # evaluate each reached gate once
+            reached = set()
+            for net, value in dict(bucket).items():
+                if values[net] == value:
+                    continue
+                before.setdefault(net, values[net])
+                values[net] = value
+                reached.update(fanout[net])
+
+            for gate in reached:
+                plan = plans[gate]
+                if plan is None:
+                    continue
+                function, ins, outs, delay, mask = plan
+                if function is None:
+                    value = self._clock_flip_flop(gate)
+                else:
+                    value = function(values, ins, mask)
+
+                # Subcircuits yield a value per output, other gates just one
+                if value.__class__ is tuple:
+                    results = value
+                else:
+                    results = (value,) * len(outs)
+
+                at = now + delay
+                for net, value in zip(outs, results):
+                    if projected[net] != value:
+                        projected[net] = value
+                        later = buckets.get(at)
+                        if later is None:
+                            later = buckets[at] = []
+                            heappush(times, at)
+                        later.append((net, value))
+
+        applied += self._report(before, listeners)
+        if until is not None and until > self.time:
+            self.time = until
+        self.events += applied
+        return applied
+
+    def _report(self, before, listeners):
+        """Tell listeners about nets that ended the current time changed
+
+        Returns:
+            Number of nets reported
+        """
+        values = self.values
+        now = self.time
+        changed = 0
+        for net, old in before.items():
+            value = values[net]
+            if value != old:
+                changed += 1
+                for listener in listeners:
+                    listener(now, net, value)
+        before.clear()
+        return changed
+
+    def _plans(self):
+        """Per-gate (function, inputs, outputs, delay, mask), cached per version
+
+        Sources, sinks and removed gates get None; flip-flops get a None
+        function and are clocked separately. Subcircuits switch all their
+        outputs after one delay, like a single gate.
+        """
+        circuit = self.circuit
+        if self._plan_version == circuit.version:
+            return self._plan_cache
+
+        # Nets added since the simulator was created start out low
+        grow = len(circuit.values) - len(self.values)
+        if grow > 0:
+            self.values.extend(bytes(grow))
+            self._projected.extend(bytes(grow))
+
+        plans = []
+        for gate, kind in enumerate(circuit.kinds):
+            outs = circuit.gate_outputs[gate]
+            if kind in SEQUENTIAL_KINDS:
+                function = None
+            else:
+                if kind == SUBCIRCUIT and gate in circuit.definitions:
+                    function = circuit.definitions[gate].evaluate
+                else:
+                    function = GATE_FUNCTIONS.get(kind)
+                if function is None:
+                    plans.append(None)
+                    continue
+            plans.append((function, circuit.gate_inputs[gate], outs,
+                          self.delays.get(kind, 1), circuit.masks[gate]))
+
+        self._plan_cache = plans
+        self._plan_version = circuit.version
+        return plans
+
+    def _clock_flip_flop(self, gate):
+        """Next output of a D flip-flop, loading D on a rising clock edge"""
+        values = self.values
+        data, clock = (values[net] for net in self.circuit.gate_inputs[gate])
+        previous = self._clock_levels.get(gate, 0)
+        self._clock_levels[gate] = clock
+        if clock and not previous:
+            return data
+        return values[self.circuit.gate_outputs[gate][0]]
@@ -0,0 +1,99 @@
+from src.engine.gates import SEQUENTIAL_KINDS
+
+
+def successors(circuit, gate):
+    """Gates reading any output of a gate combinationally
+
+    Flip-flops only sample their inputs on a clock edge, so edges into them
+    are left out and loops through registers are not feedback loops.
+    """
+    fanout = circuit.net_fanout
+    kinds = circuit.kinds
+    readers = []
+    for net in circuit.gate_outputs[gate]:
+        readers.extend(reader for reader in fanout[net]
+                       if kinds[reader] not in SEQUENTIAL_KINDS)
+    return readers
+
+
+def topological_order(circuit):
+    """Live gates ordered so drivers come before their readers
+
+    Uses an iterative depth-first search, so deep circuits do not hit the
+    recursion limit. Edges that close a feedback loop are the only ones that
+    point backwards in the result.
+    """
+    kinds = circuit.kinds
+    state = bytearray(len(kinds))
+    order = []
+
+    for root in range(len(kinds)):
+        if kinds[root] is None or state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, iter(successors(circuit, root)))]
+        while stack:
+            gate, readers = stack[-1]
+            for reader in readers:
+                if not state[reader]:
+                    state[reader] = 1
+                    stack.append((reader, iter(successors(circuit, reader))))
+                    break
+            else:
+                stack.pop()
+                order.append(gate)
+
+    order.reverse()
+    return order
+
+
+def levelize(circuit):
+    """Rank of every gate in topological order, indexed by gate id"""
+    rank = [0] * len(circuit.kinds)
+    for position, gate in enumerate(topological_order(circuit)):
+        rank[gate] = position
+    return rank
+
+
+def predecessors(circuit, gate):
+    """Gates driving any input of a gate combinationally"""
+    if circuit.kinds[gate] in SEQUENTIAL_KINDS:
+        return []
+    driver = circuit.net_driver
+    return [driver[net] for net in circuit.gate_inputs[gate] if driver[net] >= 0]
+
+
+def feedback_loops(circuit):
+    """Groups of gates that form feedback loops
+
+    Second pass of Kosaraju's algorithm over the topological order: every
+    strongly connected component with more than one gate, or a gate reading
+    its own output, is a loop.
+    """
+    kinds = circuit.kinds
+    seen = bytearray(len(kinds))
+    loops = []
+
+    for root in topological_order(circuit):
+        if seen[root]:
+            continue
+        seen[root] = 1
+        component = []
+        stack = [root]
+        while stack:
+            gate = stack.pop()
+            component.append(gate)
+            for driver in predecessors(circuit, gate):
+                if not seen[driver]:
+                    seen[driver] = 1
+                    stack.append(driver)
+
+        if len(component) > 1 or root in successors(circuit, root):
+            loops.append(sorted(component))
+
+    return loops
+
+
+def find_feedback(circuit):
+    """Sorted ids of every gate on a feedback loop"""
+    return sorted(gate for loop in feedback_loops(circuit) for gate in loop)
@@ -0,0 +1,166 @@
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from src.engine.bitparallel import truth_table_words
+
+# File layout, all integers little-endian:
+#   header   magic, version, n_inputs, n_outputs, log2 of rows per block
+#   names    length-prefixed UTF-8 titles of the inputs, then the outputs
+#   blocks   for each block of rows in order, for each output, one bit per
+#            row packed LSB first (bit j of the block is row first + j)
+# Rows are numbered with the first input as the most significant bit.
+MAGIC = b"LGTT"
+VERSION = 1
+_HEADER = struct.Struct("<4sBHHB")
+_NAME = struct.Struct("<H")
+
+# Vectors per bit-parallel pass inside a shard
+PASS_WIDTH = 1 << 16
+
+_worker_compiled = None
+
+
+def _init_worker(compiled):
+    """Receive the compiled circuit once per worker process"""
+    global _worker_compiled
+    _worker_compiled = compiled
+
+
+def _evaluate_shard(start, stop):
+    """Packed output bits for rows start to stop - 1"""
+    return evaluate_shard(_worker_compiled, start, stop)
+
+
+def evaluate_shard(compiled, start, stop):
+    """Packed output bits for a block of truth table rows
+
+    Returns:
+        One bytes object per output, one bit per row, LSB first
+    """
+    columns = [bytearray() for _ in compiled.outputs]
+    for first, rows, words in truth_table_words(compiled, start, stop, PASS_WIDTH):
+        size = (rows + 7) // 8
+        for column, word in zip(columns, words):
+            column += word.to_bytes(size, "little")
+    return [bytes(column) for column in columns]
+
+
+def _shard_bits(n_inputs, workers):
+    """log2 of rows per shard: a few shards per worker, at least one pass"""
+    bits = n_inputs - max(0, (workers * 4).bit_length())
+    return max(min(n_inputs, 16), min(bits, 24))
+
+
+def generate_truth_table(compiled, path, workers=None, mp_context=None,
+                         progress=None, cancelled=None):
+    """Enumerate every input combination and stream the outputs to a file
+
+    The input space is split into shards that are evaluated bit-parallel in
+    a process pool. Shards are written in order as they complete, with only
+    a bounded number in flight, so memory stays flat for large tables.
+
+    Args:
+        compiled: CompiledCircuit to enumerate
+        path: Destination file
+        workers: Worker processes, defaults to the CPU count
+        mp_context: Optional multiprocessing context for the pool
+        progress: Optional callback(rows_done, total_rows)
+        cancelled: Optional callable returning True to stop early
+
+    Returns:
+        Number of rows written
+    """
+    n_inputs = len(compiled.inputs)
+    total = 1 << n_inputs
+    workers = workers or os.cpu_count() or 1
+    shard_bits = _shard_bits(n_inputs, workers)
+    shard = 1 << shard_bits
+    starts = range(0, total, shard)
+
+    done = 0
+    with open(path, "wb") as file:
+        _write_header(file, compiled, shard_bits)
+
+        if workers == 1 or len(starts) == 1:
+            for start in starts:
+                if cancelled and cancelled():
+                    break
+                _write_shard(file, evaluate_shard(compiled, start, start + shard))
+                done += shard
+                if progress:
+                    progress(done, total)
+            return done
+
+        with ProcessPoolExecutor(workers, mp_context=mp_context,
+                                 initializer=_init_worker,
+                                 initargs=(compiled,)) as pool:
+            pending = []
+            next_start = iter(starts)
+            for start in next_start:
+                pending.append(pool.submit(_evaluate_shard, start, start + shard))
+                if len(pending) >= workers * 2:
+                    break
+
+            while pending:
+                if cancelled and cancelled():
+                    for future in pending:
+                        future.cancel()
+                    break
+                _write_shard(file, pending.pop(0).result())
+                done += shard
+                if progress:
+                    progress(done, total)
+                start = next(next_start, None)
+                if start is not None:
+                    pending.append(pool.submit(_evaluate_shard, start, start + shard))
+
+    return done
+
+
+def _write_header(file, compiled, shard_bits):
+    """Write the header and the string table of signal names"""
+    file.write(_HEADER.pack(MAGIC, VERSION, len(compiled.inputs),
+                            len(compiled.outputs), shard_bits))
+    for gate in compiled.inputs + compiled.outputs:
+        name = compiled.names.get(gate, "").encode("utf-8")
+        file.write(_NAME.pack(len(name)))
+        file.write(name)
+
+
+def _write_shard(file, columns):
+    """Append the packed output columns of one shard"""
+    for column in columns:
+        file.write(column)
+
+
+def read_truth_table(path):
+    """Read a truth table file back row by row
+
+    Returns:
+        (input_names, output_names, rows) where rows yields
+        (row_index, output_bits) for every row in order
+    """
+    file = open(path, "rb")
+    magic, version, n_inputs, n_outputs, shard_bits = _HEADER.unpack(
+        file.read(_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        file.close()
+        raise ValueError(f"{path} is not a truth table file")
+
+    names = []
+    for _ in range(n_inputs + n_outputs):
+        (length,) = _NAME.unpack(file.read(_NAME.size))
+        names.append(file.read(length).decode("utf-8"))
+
+    def rows():
+        with file:
+            shard = 1 << shard_bits
+            size = (shard + 7) // 8
+            for first in range(0, 1 << n_inputs, shard):
+                columns = [file.read(size) for _ in range(n_outputs)]
+                for j in range(min(shard, (1 << n_inputs) - first)):
+                    byte, bit = j >> 3, j & 7
+                    yield first + j, tuple((column[byte] >> bit) & 1 for column in columns)
+
+    return names[:n_inputs], names[n_inputs:], rows()
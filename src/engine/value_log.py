@@ -0,0 +1,72 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+# Seconds the writer waits after a record so that bursts share one write
+FLUSH_INTERVAL = 0.2
+
+
+class ValueLogger:
+    """Appends timestamped value changes to a text file in the background
+
+    log() only queues a record, so callers never wait on the disk. A writer
+    thread collects whatever arrived within FLUSH_INTERVAL and writes it as
+    one batch. Each line holds an ISO timestamp, the signal name and its
+    value, separated by tabs.
+
+    Args:
+        path: Log file, opened here so errors surface to the caller
+        append: Keep existing records instead of truncating the file
+    """
+
+    def __init__(self, path, append=True, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.error = None
+        self._queue = queue.SimpleQueue()
+        self._file = open(path, "a" if append else "w")
+        self._thread = threading.Thread(target=self._write_loop, name="ValueLogger", daemon=True)
+        self._thread.start()
+
+    def log(self, name, value):
+        """Queue one value change, stamped with the current time"""
+        if self.error is None:
+            self._queue.put((time.time(), name, value))
+
+    def close(self):
+        """Write the remaining records and close the file"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _write_loop(self):
+        """Write queued records in batches until closed"""
+        records = self._queue
+        try:
+            while True:
+                batch = [records.get()]
+                if batch[0] is not None:
+                    time.sleep(self.flush_interval)
+                while True:
+                    try:
+                        batch.append(records.get_nowait())
+                    except queue.Empty:
+                        break
+
+                lines = []
+                for record in batch:
+                    if record is None:
+                        break
+                    stamp, name, value = record
+                    stamp = datetime.fromtimestamp(stamp).isoformat(timespec="milliseconds")
+                    lines.append(f"{stamp}\t{name}\t{value}\n")
+                self._file.write("".join(lines))
+                self._file.flush()
+
+                if record is None:
+                    return
+        except OSError as e:
+            self.error = e
+        finally:
+            self._file.close()
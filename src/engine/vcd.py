@@ -0,0 +1,142 @@
+import re
+
+from src.engine.gates import SINK_KINDS
+
+# Buffer size of the output file; writes reach the disk in large blocks
+BUFFER_SIZE = 1 << 20
+
+
+def _identifier(index):
+    """Short VCD identifier code built from printable ASCII"""
+    code = ""
+    index += 1
+    while index:
+        index, digit = divmod(index - 1, 94)
+        code += chr(33 + digit)
+    return code
+
+
+def _reference(name):
+    """Signal name usable as a VCD reference"""
+    return re.sub(r"[^A-Za-z0-9_.\[\]]", "_", name) or "_"
+
+
+def circuit_signals(circuit, gates=None):
+    """(name, net) pairs to record for gates
+
+    Gates with outputs contribute each output net. Sinks contribute the net
+    they read. Names default to the gate title and id.
+
+    Args:
+        gates: Gates to record, defaults to every input and output gate
+    """
+    if gates is None:
+        gates = circuit.input_gates() + circuit.output_gates()
+    signals = []
+    for gate in gates:
+        name = f"{circuit.names[gate] or circuit.kinds[gate]}_{gate}"
+        if circuit.kinds[gate] in SINK_KINDS:
+            nets = circuit.gate_inputs[gate]
+        else:
+            nets = circuit.gate_outputs[gate]
+        for pin, net in enumerate(nets):
+            signals.append((name if len(nets) == 1 else f"{name}.{pin}", net))
+    return signals
+
+
+def _change(value, code, width):
+    """VCD line setting a signal; buses are written as binary vectors"""
+    if width == 1:
+        return f"{value}{code}\n"
+    return f"b{value:b} {code}\n"
+
+
+class VcdWriter:
+    """Streams value changes of selected nets to a Value Change Dump file
+
+    Only real transitions are written, through a large file buffer, so a
+    long run costs no memory beyond the last value of each signal. Use
+    record() as a Circuit observer, or change() as a TimingSimulator
+    watcher. Bus nets are declared with their width.
+
+    Args:
+        path: Destination .vcd file
+        circuit: Circuit the nets belong to, for their initial values
+        signals: List of (name, net) pairs; nets may repeat
+        timescale: VCD timescale of one time unit
+        clock: Optional callable returning the current time for record(),
+            defaults to counting record() calls
+    """
+
+    def __init__(self, path, circuit, signals, timescale="1 ns", clock=None):
+        self.circuit = circuit
+        self.clock = clock
+        self._steps = 0
+        self._codes = {}
+        self._widths = {}
+        self._last = {}
+
+        self.file = open(path, "w", buffering=BUFFER_SIZE)
+        write = self.file.write
+        write(f"$timescale {timescale} $end\n")
+        write("$scope module circuit $end\n")
+        for name, net in signals:
+            code = self._codes.get(net)
+            if code is None:
+                code = self._codes[net] = _identifier(len(self._codes))
+                self._widths[net] = circuit.net_width(net)
+            write(f"$var wire {self._widths[net]} {code} {_reference(name)} $end\n")
+        write("$upscope $end\n$enddefinitions $end\n")
+
+        write("#0\n$dumpvars\n")
+        values = circuit.values
+        for net, code in self._codes.items():
+            self._last[net] = values[net]
+            write(_change(values[net], code, self._widths[net]))
+        write("$end\n")
+        self.time = 0
+
+    def _advance(self, time):
+        """Emit a timestamp if time moved on"""
+        if time != self.time:
+            self.file.write(f"#{time}\n")
+            self.time = time
+
+    def change(self, time, net, value):
+        """Record one net change, with the TimingSimulator.watch signature"""
+        code = self._codes.get(net)
+        if code is None or self._last[net] == value:
+            return
+        self._last[net] = value
+        self._advance(time)
+        self.file.write(_change(value, code, self._widths[net]))
+
+    def record(self, changed):
+        """Record the nets a propagation changed, at the clock's time"""
+        self._steps += 1
+        codes = self._codes
+        widths = self._widths
+        last = self._last
+        values = self.circuit.values
+        lines = []
+        for net in changed:
+            code = codes.get(net)
+            if code is not None and last[net] != values[net]:
+                last[net] = values[net]
+                lines.append(_change(values[net], code, widths[net]))
+        if lines:
+            self._advance(self.clock() if self.clock else self._steps)
+            self.file.write("".join(lines))
+
+    def close(self):
+        """Write the final timestamp and close the file"""
+        if not self.file.closed:
+            if self.clock:
+                self._advance(self.clock())
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,5 +1,6 @@
 from PyQt5.QtWidgets import (QMainWindow, QTabWidget, QAction, QDockWidget, 
-                            QVBoxLayout, QWidget, QMessageBox, QFileDialog, QApplication)
+                            QVBoxLayout, QWidget, QMessageBox, QFileDialog, QApplication,
+                            QInputDialog)
 from PyQt5.QtCore import Qt, QByteArray, QDataStream, QIODevice
 from src.gui.node_editor import NodeEditorView
 from src.gui.side_panel import SidePanel
@@ -7,22 +8,31 @@ from src.nodes.node_factory import NodeFactory
 from src.nodes.base_nodes import Connection, Node, Socket
 from src.gui.operations import NodeOperations
 from src.gui.theme_manager import ThemeManager
-import json
+from src.engine.scene_file import load_scene_data, save_scene, socket_values, connection_fields
+from src.engine.gates import BUS_KINDS, MAX_BUS_WIDTH, SOURCE_KINDS
+from src.engine.scheduler import OscillationError
 import os
+import time
 
 class MainWindow(QMainWindow):
     """Main window for the logic gate simulator"""
     
-    def __init__(self):
+    def __init__(self, file_paths=()):
         super().__init__()
         
         self.setWindowTitle("Logic Gate Simulator")
         self.resize(1200, 800)
 
         self.tab_file_paths = {}
+        self.truth_table_worker = None
+        self.stimulus_player = None
+        self.waveform = None
         
+        # Editors whose file is read only when their tab is first shown
+        self.pending_files = {}
         
-        self._setup_ui()
+        
+        self._setup_ui(file_paths)
         self._setup_actions()
         self._setup_menus()
         
@@ -32,14 +42,18 @@ class MainWindow(QMainWindow):
         
         self._apply_current_theme()
         
-    def _setup_ui(self):
+    def _setup_ui(self, file_paths=()):
         """Set up the user interface"""
         
         self.tab_widget = QTabWidget()
         self.setCentralWidget(self.tab_widget)
+        self.tab_widget.currentChanged.connect(self._load_pending_tab)
         
         
-        self._create_new_tab()
+        if file_paths:
+            self.open_files(file_paths)
+        else:
+            self._create_new_tab()
         
         
         self._setup_side_panel()
@@ -94,17 +108,50 @@ class MainWindow(QMainWindow):
         self.action_delete = QAction("Delete", self)
         self.action_delete.setShortcut("Delete")
         
+        self.action_insert_subcircuit = QAction("Insert Subcircuit...", self)
+        
+        self.action_bus_width = QAction("Set Bus Width...", self)
+        
         
         self.action_toggle_theme = QAction("Toggle Light/Dark Mode", self)
         self.action_toggle_theme.setShortcut("Ctrl+T")
         
         
+        self.action_truth_table = QAction("Generate Truth Table...", self)
+        self.action_truth_table.setShortcut("Ctrl+Shift+T")
+        
+        self.action_run_cycles = QAction("Run Clock Cycles...", self)
+        self.action_run_cycles.setShortcut("Ctrl+R")
+        
+        self.action_play_stimulus = QAction("Play Stimulus File...", self)
+        self.action_play_stimulus.setShortcut("Ctrl+Shift+P")
+        
+        self.action_record_waveform = QAction("Record Waveform...", self)
+        self.action_record_waveform.setShortcut("Ctrl+Shift+W")
+        
+        self.action_input_vector = QAction("Apply Input Vector...", self)
+        self.action_input_vector.setShortcut("Ctrl+Shift+V")
+        
+        self.action_fanin_cone = QAction("Highlight Fan-in Cone", self)
+        self.action_fanin_cone.setShortcut("Ctrl+Shift+I")
+        
+        self.action_fanout_cone = QAction("Highlight Fan-out Cone", self)
+        self.action_fanout_cone.setShortcut("Ctrl+Shift+O")
+        
+        
         self.action_new.triggered.connect(self._create_new_tab)
         self.action_save.triggered.connect(self._save_current_tab)
         self.action_save_as.triggered.connect(self._save_as_current_tab)
         self.action_open.triggered.connect(self._open_file)
         self.action_exit.triggered.connect(self.close)
         self.action_toggle_theme.triggered.connect(self._toggle_theme)
+        self.action_truth_table.triggered.connect(self._generate_truth_table)
+        self.action_run_cycles.triggered.connect(self._run_clock_cycles)
+        self.action_input_vector.triggered.connect(self._apply_input_vector)
+        self.action_play_stimulus.triggered.connect(self._play_stimulus)
+        self.action_record_waveform.triggered.connect(self._toggle_waveform)
+        self.action_fanin_cone.triggered.connect(self._highlight_fanin_cone)
+        self.action_fanout_cone.triggered.connect(self._highlight_fanout_cone)
         
         
         self.action_undo.triggered.connect(self._undo)
@@ -113,6 +160,8 @@ class MainWindow(QMainWindow):
         self.action_copy.triggered.connect(self._copy)
         self.action_paste.triggered.connect(self._paste)
         self.action_delete.triggered.connect(self._delete)
+        self.action_insert_subcircuit.triggered.connect(self._insert_subcircuit)
+        self.action_bus_width.triggered.connect(self._set_bus_width)
         
     def _setup_menus(self):
         """Set up the menu bars"""
@@ -137,11 +186,25 @@ class MainWindow(QMainWindow):
         self.edit_menu.addAction(self.action_copy)
         self.edit_menu.addAction(self.action_paste)
         self.edit_menu.addAction(self.action_delete)
+        self.edit_menu.addSeparator()
+        self.edit_menu.addAction(self.action_insert_subcircuit)
+        self.edit_menu.addAction(self.action_bus_width)
         
         
         self.view_menu = self.menu_bar.addMenu("View")
         self.view_menu.addAction(self.action_toggle_theme)
         
+        
+        self.simulation_menu = self.menu_bar.addMenu("Simulation")
+        self.simulation_menu.addAction(self.action_truth_table)
+        self.simulation_menu.addAction(self.action_run_cycles)
+        self.simulation_menu.addAction(self.action_input_vector)
+        self.simulation_menu.addAction(self.action_play_stimulus)
+        self.simulation_menu.addAction(self.action_record_waveform)
+        self.simulation_menu.addSeparator()
+        self.simulation_menu.addAction(self.action_fanin_cone)
+        self.simulation_menu.addAction(self.action_fanout_cone)
+        
     def _apply_current_theme(self):
         """Apply the current theme saved in settings"""
         import sys
@@ -221,17 +284,17 @@ class MainWindow(QMainWindow):
             return  
             
         
-        file_path, _ = QFileDialog.getSaveFileName(
+        file_path, selected_filter = QFileDialog.getSaveFileName(
             self, 
             "Save Circuit", 
             "", 
-            "Logic Gate Simulator Files (*.lgs);;All Files (*)"
+            "Logic Gate Simulator Files (*.lgs);;Binary Circuit Files (*.lgsb);;All Files (*)"
         )
         
         if file_path:
            
-            if not file_path.endswith('.lgs'):
-                file_path += '.lgs'
+            if not file_path.endswith(('.lgs', '.lgsb')):
+                file_path += '.lgsb' if '*.lgsb' in selected_filter else '.lgs'
                 
             
             if self._save_to_file(file_path):
@@ -250,11 +313,10 @@ class MainWindow(QMainWindow):
             
         try:
          
-            scene_data = self._serialize_scene(editor.scene)
-            
-           
-            with open(file_path, 'w') as file:
-                json.dump(scene_data, file, indent=4)
+            # Streamed as it is walked; .lgsb paths get the binary format
+            nodes, connections = self._serialize_scene(
+                editor.scene, os.path.dirname(os.path.abspath(file_path)))
+            save_scene(file_path, nodes, connections)
                 
            
             self.statusBar().showMessage(f"File saved to {file_path}", 3000)
@@ -269,7 +331,7 @@ class MainWindow(QMainWindow):
             self,
             "Open Circuit",
             "",
-            "Logic Gate Simulator Files (*.lgs);;All Files (*)"
+            "Logic Gate Simulator Files (*.lgs *.lgsb);;All Files (*)"
         )
         
         if not file_path:
@@ -292,6 +354,39 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Open Error", f"Error opening file: {str(e)}")
     
+    def open_files(self, file_paths):
+        """Open circuit files in new tabs
+        
+        Every file gets its tab straight away, but only the first one is
+        read; the others are loaded when their tab is first shown.
+        """
+        first = None
+        for file_path in file_paths:
+            self._create_new_tab()
+            current_tab = self.tab_widget.currentIndex()
+            
+            self.tab_widget.setTabText(current_tab, os.path.basename(file_path))
+            self.tab_file_paths[current_tab] = file_path
+            self.pending_files[self.tab_widget.widget(current_tab)] = file_path
+            if first is None:
+                first = current_tab
+                
+        if first is not None:
+            self.tab_widget.setCurrentIndex(first)
+            self._load_pending_tab(first)
+    
+    def _load_pending_tab(self, index):
+        """Read the file of a tab opened by open_files once it is shown"""
+        file_path = self.pending_files.pop(self.tab_widget.widget(index), None)
+        if not file_path:
+            return
+            
+        try:
+            self._load_from_file(file_path)
+            self.statusBar().showMessage(f"File opened: {file_path}", 3000)
+        except Exception as e:
+            QMessageBox.critical(self, "Open Error", f"Error opening file: {str(e)}")
+    
     def _load_from_file(self, file_path):
         """Load circuit from file into current editor"""
         editor = self._get_current_editor()
@@ -299,69 +394,52 @@ class MainWindow(QMainWindow):
             return
             
         try:
-            with open(file_path, 'r') as file:
-                scene_data = json.load(file)
+            scene_data = load_scene_data(file_path)
                 
           
+            editor.scene.base_dir = os.path.dirname(os.path.abspath(file_path))
             self._deserialize_scene(editor.scene, scene_data)
             
             return True
         except Exception as e:
             raise Exception(f"Error loading file: {str(e)}")
     
-    def _serialize_scene(self, scene):
-        """Serialize scene data to JSON-compatible format"""
-        data = {
-            'nodes': [],
-            'connections': []
-        }
-    
-        for item in scene.items():
-            if isinstance(item, Node):
-                node_data = {
-                    'id': id(item),
-                    'type': item.__class__.__name__,
-                    'pos_x': item.pos().x(),
-                    'pos_y': item.pos().y(),
-                    'inputs': [],
-                    'outputs': [],
-                    'properties': item.get_properties() if hasattr(item, 'get_properties') else {}
+    def _serialize_scene(self, scene, base_dir):
+        """Nodes and connections of a scene, generated for save_scene
+        
+        Nodes are numbered in the order they were created, so saving an
+        unchanged circuit again gives the same file. Both generators walk
+        the scene's nodes directly instead of every graphics item. File
+        paths in properties are written relative to base_dir, the directory
+        of the file being saved.
+        
+        Returns:
+            (nodes, connections) generators
+        """
+        nodes = list(scene.simulation.nodes.values())
+        node_ids = {node: index for index, node in enumerate(nodes)}
+        
+        def node_records():
+            for index, node in enumerate(nodes):
+                yield {
+                    'id': index,
+                    'type': node.__class__.__name__,
+                    'pos_x': node.pos().x(),
+                    'pos_y': node.pos().y(),
+                    'inputs': [int(socket.value) for socket in node.input_sockets],
+                    'outputs': [int(socket.value) for socket in node.output_sockets],
+                    'properties': node.get_saved_properties(base_dir)
                 }
                 
-               
-                for socket in item.input_sockets:
-                    socket_data = {
-                        'id': id(socket),
-                        'index': socket.index,
-                        'value': socket.value
-                    }
-                    node_data['inputs'].append(socket_data)
-                
-               
-                for socket in item.output_sockets:
-                    socket_data = {
-                        'id': id(socket),
-                        'index': socket.index,
-                        'value': socket.value
-                    }
-                    node_data['outputs'].append(socket_data)
-                
-                data['nodes'].append(node_data)
-        
-      
-        for item in scene.items():
-            if isinstance(item, Connection):
-                if item.start_socket and item.end_socket:
-                    connection_data = {
-                        'id': id(item),
-                        'start_node': id(item.start_socket.node),
-                        'start_socket': item.start_socket.index,
-                        'end_node': id(item.end_socket.node),
-                        'end_socket': item.end_socket.index
-                    }
-                    data['connections'].append(connection_data)
-        
-        return data
+        def connection_records():
+            for index, node in enumerate(nodes):
+                for socket in node.output_sockets:
+                    for connection in socket.connections:
+                        end_socket = connection.end_socket
+                        if end_socket and end_socket.node in node_ids:
+                            yield (index, socket.index, node_ids[end_socket.node], end_socket.index)
+                            
+        return node_records(), connection_records()
     
     def _deserialize_scene(self, scene, data):
         """Deserialize scene data from JSON"""
@@ -369,54 +447,312 @@ class MainWindow(QMainWindow):
         scene.clear()
         
     
-        nodes = {}
-        node_sockets = {}
+        # Build everything first, then propagate once
+        with scene.bulk_load():
+            nodes = {}
         
      
-        for node_data in data['nodes']:
-            node_type = node_data['type']
+            for node_data in data['nodes']:
+                node_type = node_data['type']
             
             
-            node = NodeFactory.create_node(scene, node_type)
-            node.setPos(node_data['pos_x'], node_data['pos_y'])
+                node = NodeFactory.create_node(scene, node_type)
+                node.setPos(node_data['pos_x'], node_data['pos_y'])
             
          
-            if 'properties' in node_data and hasattr(node, 'set_properties'):
-                node.set_properties(node_data['properties'])
+                if 'properties' in node_data and hasattr(node, 'set_properties'):
+                    node.set_properties(node_data['properties'])
             
            
-            nodes[node_data['id']] = node
+                nodes[node_data['id']] = node
             
             
-            for i, socket_data in enumerate(node_data['inputs']):
-                if i < len(node.input_sockets):
-                    node_sockets[socket_data['id']] = node.input_sockets[i]
-                    node.input_sockets[i].value = socket_data['value']
+                for socket, value in zip(node.input_sockets, socket_values(node_data['inputs'])):
+                    socket.value = value
             
-            for i, socket_data in enumerate(node_data['outputs']):
-                if i < len(node.output_sockets):
-                    node_sockets[socket_data['id']] = node.output_sockets[i]
-                    node.output_sockets[i].value = socket_data['value']
+                for socket, value in zip(node.output_sockets, socket_values(node_data['outputs'])):
+                    socket.value = value
+                    
+                # Drive saved input values, so the field, netlist and display agree
+                if node.gate_type in SOURCE_KINDS and node.output_sockets:
+                    node.set_value(node.output_sockets[0].value)
         
        
-        for conn_data in data['connections']:
-            if (conn_data['start_node'] in nodes and conn_data['end_node'] in nodes):
-                start_node = nodes[conn_data['start_node']]
-                end_node = nodes[conn_data['end_node']]
+            for conn_data in data['connections']:
+                start_id, start_index, end_id, end_index = connection_fields(conn_data)
+                if (start_id in nodes and end_id in nodes):
+                    start_node = nodes[start_id]
+                    end_node = nodes[end_id]
                 
-                if (conn_data['start_socket'] < len(start_node.output_sockets) and 
-                    conn_data['end_socket'] < len(end_node.input_sockets)):
+                    if (start_index < len(start_node.output_sockets) and 
+                        end_index < len(end_node.input_sockets)):
                     
-                    start_socket = start_node.output_sockets[conn_data['start_socket']]
-                    end_socket = end_node.input_sockets[conn_data['end_socket']]
+                        start_socket = start_node.output_sockets[start_index]
+                        end_socket = end_node.input_sockets[end_index]
                     
                    
-                    conn = Connection(scene, start_socket=start_socket, end_socket=end_socket)
+                        if start_socket.can_connect(end_socket):
+                            conn = Connection(scene, start_socket=start_socket, end_socket=end_socket)
+    
+    def _generate_truth_table(self):
+        """Enumerate every input combination of the current tab to a file"""
+        editor = self._get_current_editor()
+        if not editor:
+            return
+            
+        try:
+            # The table is built from a simplified copy; the scene keeps every gate
+            optimized, _ = editor.scene.simulation.circuit.optimize()
+            compiled = optimized.compile()
+        except (ValueError, OscillationError) as e:
+            QMessageBox.warning(self, "Truth Table", str(e))
+            return
+            
+        if not compiled.inputs or not compiled.outputs:
+            QMessageBox.warning(self, "Truth Table", 
+                                "The circuit needs at least one input and one output node.")
+            return
+            
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Truth Table",
+            "",
+            "Truth Table Files (*.lgtt);;All Files (*)"
+        )
+        
+        if not file_path:
+            return
+            
+        if not file_path.endswith('.lgtt'):
+            file_path += '.lgtt'
+            
         
+        from src.gui.workers import TruthTableWorker
+        self.truth_table_worker = TruthTableWorker(compiled, file_path, self)
+        self.truth_table_worker.progress.connect(self._on_truth_table_progress)
+        self.truth_table_worker.succeeded.connect(self._on_truth_table_done)
+        self.truth_table_worker.failed.connect(self._on_truth_table_failed)
+        self.action_truth_table.setEnabled(False)
+        self.truth_table_worker.start()
         
-        for node in nodes.values():
-            if hasattr(node, 'calculate_output'):
-                node.calculate_output()
+        self.statusBar().showMessage(f"Generating truth table for {len(compiled.inputs)} inputs...")
+    
+    def _on_truth_table_progress(self, done, total):
+        """Show truth table progress in the status bar"""
+        self.statusBar().showMessage(f"Generating truth table: {100 * done // total}%")
+    
+    def _on_truth_table_done(self, file_path, rows):
+        """Report a finished truth table"""
+        self.action_truth_table.setEnabled(True)
+        self.statusBar().showMessage(f"Truth table with {rows} rows saved to {file_path}", 5000)
+    
+    def _on_truth_table_failed(self, message):
+        """Report a failed truth table"""
+        self.action_truth_table.setEnabled(True)
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Truth Table Error", f"Error generating truth table: {message}")
+    
+    def _run_clock_cycles(self):
+        """Advance the flip-flops of the current tab by a number of clock cycles"""
+        editor = self._get_current_editor()
+        if not editor:
+            return
+            
+        cycles, ok = QInputDialog.getInt(self, "Run Clock Cycles", "Cycles:", 1, 1, 10**9)
+        if not ok:
+            return
+            
+        try:
+            editor.scene.simulation.run_cycles(cycles)
+        except ValueError as e:
+            QMessageBox.warning(self, "Run Clock Cycles", str(e))
+            return
+            
+        self.statusBar().showMessage(f"Ran {cycles} clock cycles", 3000)
+    
+    def _apply_input_vector(self):
+        """Set every input of the current tab from one typed vector in one pass"""
+        editor = self._get_current_editor()
+        if not editor:
+            return
+            
+        simulation = editor.scene.simulation
+        inputs = simulation.screen_order(simulation.input_nodes())
+        if not inputs:
+            QMessageBox.information(self, "Apply Input Vector", "The circuit has no inputs.")
+            return
+            
+        widths = [node.bus_width for node in inputs]
+        if any(width > 1 for width in widths):
+            prompt = f"Comma-separated values for the {len(inputs)} inputs, top to bottom:"
+        else:
+            prompt = f"Bits for the {len(inputs)} inputs, top to bottom:"
+        text, ok = QInputDialog.getText(self, "Apply Input Vector", prompt)
+        if not ok:
+            return
+            
+        from src.engine.stimulus import parse_vector
+        try:
+            values = parse_vector(text, widths)
+        except ValueError as e:
+            QMessageBox.warning(self, "Apply Input Vector", str(e))
+            return
+            
+        simulation.set_inputs(dict(zip(inputs, values)))
+        self.statusBar().showMessage(f"Applied input vector {text.strip()}", 3000)
+    
+    def _play_stimulus(self):
+        """Stream a stimulus file into the current tab, or stop a running one"""
+        if self.stimulus_player:
+            self.stimulus_player.stop()
+            return
+
+        editor = self._get_current_editor()
+        if not editor:
+            return
+            
+        stimulus_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Open Stimulus",
+            "",
+            "Stimulus Files (*.csv *.txt);;All Files (*)"
+        )
+        if not stimulus_path:
+            return
+            
+        out_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Outputs",
+            "",
+            "CSV Files (*.csv);;All Files (*)"
+        )
+        if not out_path:
+            return
+            
+        interval, ok = QInputDialog.getInt(self, "Play Stimulus", "Milliseconds per step:", 100, 0, 60000)
+        if not ok:
+            return
+            
+        from src.gui.workers import StimulusPlayer
+        try:
+            self.stimulus_player = StimulusPlayer(editor.scene.simulation, stimulus_path, out_path, interval, self)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Play Stimulus", str(e))
+            return
+            
+        self.stimulus_player.stepped.connect(self._on_stimulus_step)
+        self.stimulus_player.finished.connect(self._on_stimulus_done)
+        self.stimulus_player.failed.connect(self._on_stimulus_failed)
+        self.action_play_stimulus.setText("Stop Stimulus")
+        self.stimulus_player.start()
+    
+    def _on_stimulus_step(self, steps):
+        """Show stimulus progress in the status bar"""
+        self.statusBar().showMessage(f"Playing stimulus: step {steps}")
+    
+    def _on_stimulus_done(self, steps):
+        """Report a finished stimulus run"""
+        self.stimulus_player = None
+        self.action_play_stimulus.setText("Play Stimulus File...")
+        self.statusBar().showMessage(f"Stimulus finished after {steps} steps", 5000)
+    
+    def _on_stimulus_failed(self, message):
+        """Report a stimulus file that could not be played"""
+        self.stimulus_player = None
+        self.action_play_stimulus.setText("Play Stimulus File...")
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Play Stimulus", message)
+    
+    def _toggle_waveform(self):
+        """Start recording the selected nodes to a VCD file, or stop recording"""
+        if self.waveform:
+            circuit, writer = self.waveform
+            if writer.record in circuit.observers:
+                circuit.observers.remove(writer.record)
+            writer.close()
+            self.waveform = None
+            self.action_record_waveform.setText("Record Waveform...")
+            self.statusBar().showMessage(f"Waveform saved to {writer.file.name}", 5000)
+            return
+            
+        editor = self._get_current_editor()
+        if not editor:
+            return
+            
+        simulation = editor.scene.simulation
+        selected = [item for item in editor.scene.selectedItems() if isinstance(item, Node)]
+        if selected:
+            gates = sorted(node.gate_id for node in selected)
+        else:
+            gates = [node.gate_id for node in simulation.input_nodes() + simulation.output_nodes()]
+        if not gates:
+            QMessageBox.information(self, "Record Waveform", "Select the nodes to record.")
+            return
+            
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Waveform",
+            "",
+            "Value Change Dump (*.vcd);;All Files (*)"
+        )
+        if not file_path:
+            return
+            
+        if not file_path.endswith('.vcd'):
+            file_path += '.vcd'
+            
+        from src.engine.vcd import VcdWriter, circuit_signals
+        circuit = simulation.circuit
+        start = time.monotonic()
+        try:
+            writer = VcdWriter(
+                file_path, circuit, circuit_signals(circuit, gates), "1 ms",
+                clock=lambda: int((time.monotonic() - start) * 1000)
+            )
+        except OSError as e:
+            QMessageBox.warning(self, "Record Waveform", str(e))
+            return
+            
+        circuit.observers.append(writer.record)
+        self.waveform = (circuit, writer)
+        self.action_record_waveform.setText("Stop Recording Waveform")
+        self.statusBar().showMessage(f"Recording {len(gates)} nodes to {file_path}", 3000)
+    
+    def _highlight_fanin_cone(self):
+        """Select every node driving the selected nodes"""
+        self._highlight_cone(fanout=False)
+    
+    def _highlight_fanout_cone(self):
+        """Select every node driven by the selected nodes"""
+        self._highlight_cone(fanout=True)
+    
+    def _highlight_cone(self, fanout):
+        """Replace the selection with the fan-in or fan-out cone of the selected nodes"""
+        editor = self._get_current_editor()
+        if not editor:
+            return
+            
+        scene = editor.scene
+        selected = [item for item in scene.selectedItems() if isinstance(item, Node)]
+        if not selected:
+            self.statusBar().showMessage("Select a node to highlight its cone", 3000)
+            return
+            
+        cone = scene.simulation.cone_nodes(selected, fanout)
+        scene.clearSelection()
+        for node in cone:
+            node.setSelected(True)
+            
+        # Endpoint counts come straight from the cone index
+        endpoints = set()
+        for node in selected:
+            outputs, inputs = scene.simulation.cone_endpoints(node)
+            endpoints.update(outputs if fanout else inputs)
+        direction = "Fan-out" if fanout else "Fan-in"
+        kind = "outputs" if fanout else "inputs"
+        self.statusBar().showMessage(
+            f"{direction} cone: {len(cone)} nodes, {len(endpoints)} {kind}", 5000
+        )
     
     def _undo(self):
         """Undo the last operation"""
@@ -454,6 +790,66 @@ class MainWindow(QMainWindow):
         if editor and hasattr(self.operations, 'delete'):
             self.operations.delete()
     
+    def _insert_subcircuit(self):
+        """Place an instance of a saved circuit in the current tab"""
+        editor = self._get_current_editor()
+        if not editor:
+            return
+            
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Insert Subcircuit",
+            "",
+            "Logic Gate Simulator Files (*.lgs *.lgsb);;All Files (*)"
+        )
+        if not file_path:
+            return
+            
+        from src.engine.subcircuit import load_definition
+        from src.nodes.subcircuit_nodes import SubcircuitNode
+        try:
+            definition = load_definition(file_path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Insert Subcircuit", f"Cannot use {file_path} as a subcircuit: {str(e)}")
+            return
+            
+        node = SubcircuitNode(editor.scene, definition)
+        node.setPos(editor.mapToScene(editor.viewport().rect().center()))
+    
+    def _set_bus_width(self):
+        """Make the selected nodes carry buses of a given width"""
+        editor = self._get_current_editor()
+        if not editor:
+            return
+            
+        nodes = [item for item in editor.scene.selectedItems() if isinstance(item, Node)]
+        if not nodes:
+            QMessageBox.information(self, "Set Bus Width", "Select the nodes to change first.")
+            return
+            
+        width, ok = QInputDialog.getInt(
+            self, "Set Bus Width", "Bits per socket:", nodes[0].bus_width, 1, MAX_BUS_WIDTH
+        )
+        if not ok:
+            return
+            
+        skipped = [node.title for node in nodes if width > 1 and node.gate_type not in BUS_KINDS]
+        nodes = [node for node in nodes if width == 1 or node.gate_type in BUS_KINDS]
+        
+        # Widen the gates together first, so wires between them stay
+        simulation = editor.scene.simulation
+        with simulation.deferred():
+            simulation.set_width(nodes, width)
+            for node in nodes:
+                node.set_bus_width(width)
+                    
+        if skipped:
+            QMessageBox.warning(
+                self, "Set Bus Width",
+                f"These nodes cannot carry a bus: {', '.join(skipped)}"
+            )
+        self.statusBar().showMessage(f"Set bus width to {width}", 3000)
+    
     def closeEvent(self, event):
         """Handle application close event"""
         # Check for unsaved changes
@@ -471,6 +867,23 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
         
+        # Stop a running truth table before the window goes away
+        if self.truth_table_worker and self.truth_table_worker.isRunning():
+            self.truth_table_worker.requestInterruption()
+            self.truth_table_worker.wait()
+            
+        if self.stimulus_player:
+            self.stimulus_player.stop()
+            
+        if self.waveform:
+            self._toggle_waveform()
+            
+        # Let file output nodes write out their pending records
+        for i in range(self.tab_widget.count()):
+            for item in self.tab_widget.widget(i).scene.items():
+                if hasattr(item, 'shutdown'):
+                    item.shutdown()
+        
         event.accept()
     
     def _has_unsaved_changes(self):
@@ -498,6 +911,7 @@ class MainWindow(QMainWindow):
             elif reply == QMessageBox.Cancel:
                 return
         
+        self.pending_files.pop(self.tab_widget.widget(index), None)
         self.tab_widget.removeTab(index)
         
         if index in self.tab_file_paths:
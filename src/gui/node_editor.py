@@ -1,8 +1,10 @@
+from contextlib import contextmanager
 from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem
 from PyQt5.QtCore import Qt, QPoint, QPointF, QRectF
 from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QPainterPath
 from src.nodes.base_nodes import Connection, Socket, Node
 from src.nodes.node_factory import NodeFactory
+from src.nodes.simulation import SceneSimulation
 from src.gui.theme_manager import ThemeManager
 
 class NodeEditorScene(QGraphicsScene):
@@ -14,6 +16,12 @@ class NodeEditorScene(QGraphicsScene):
         self.grid_size = 20
         self.grid_squares = 5
         
+        # Headless circuit the nodes of this scene mirror
+        self.simulation = SceneSimulation(self.report_oscillation)
+        
+        # Directory of the loaded file, where relative subcircuit paths start
+        self.base_dir = ""
+        
        
         self.connecting = False
         self.temp_connection = None
@@ -43,6 +51,42 @@ class NodeEditorScene(QGraphicsScene):
         for y in range(top, int(rect.bottom()), self.grid_size):
             painter.drawLine(QPointF(rect.left(), y), QPointF(rect.right(), y))
     
+    @contextmanager
+    def bulk_load(self):
+        """Add many nodes and connections at once, as for a load or a paste
+
+        The circuit skips its per-wire bookkeeping and propagates once, in
+        a single levelized pass, when the block ends. The BSP index is off
+        while items go in and is rebuilt in one go afterwards.
+        """
+        simulation = self.simulation
+        index_method = self.itemIndexMethod()
+        self.setItemIndexMethod(QGraphicsScene.NoIndex)
+        try:
+            with simulation.deferred(), simulation.circuit.bulk_edit():
+                yield self
+        finally:
+            self.setItemIndexMethod(index_method)
+
+    def clear(self):
+        """Remove all items and start over with an empty circuit"""
+        for item in self.items():
+            if hasattr(item, 'shutdown'):
+                item.shutdown()
+        super().clear()
+        self.simulation = SceneSimulation(self.report_oscillation)
+    
+    def report_oscillation(self, nodes, message):
+        """Select the nodes of a feedback loop that never settles"""
+        self.clearSelection()
+        for node in nodes:
+            node.setSelected(True)
+            
+        for view in self.views():
+            window = view.window()
+            if hasattr(window, 'statusBar'):
+                window.statusBar().showMessage(message, 5000)
+    
     def update_theme(self):
         """Update scene appearance when theme changes"""
         theme = ThemeManager.get_current_theme()
@@ -158,10 +202,7 @@ class NodeEditorView(QGraphicsView):
             hover_socket = self.find_socket_at_position(event.pos())
             if hover_socket and hover_socket != self.start_socket:
                 
-                valid = ((self.start_socket.socket_type == Socket.TYPE_OUTPUT and 
-                         hover_socket.socket_type == Socket.TYPE_INPUT) or
-                        (self.start_socket.socket_type == Socket.TYPE_INPUT and 
-                         hover_socket.socket_type == Socket.TYPE_OUTPUT))
+                valid = self.start_socket.can_connect(hover_socket)
                 
                
                 state = "valid" if valid else "invalid"
@@ -177,38 +218,25 @@ class NodeEditorView(QGraphicsView):
         if event.button() == Qt.LeftButton and self.connecting:
             end_socket = self.find_socket_at_position(event.pos())
             
+            # The temporary wire goes whether the drop makes a connection or not
+            if self.temp_connection:
+                self.scene.removeItem(self.temp_connection)
+            
             if end_socket and end_socket != self.start_socket:
                 
-                valid_connection = (
-                    (self.start_socket.socket_type == Socket.TYPE_OUTPUT and 
-                     end_socket.socket_type == Socket.TYPE_INPUT) or
-                    (self.start_socket.socket_type == Socket.TYPE_INPUT and 
-                     end_socket.socket_type == Socket.TYPE_OUTPUT)
-                )
+                valid_connection = self.start_socket.can_connect(end_socket)
                 
                 if valid_connection:
                    
                     output_socket = self.start_socket if self.start_socket.socket_type == Socket.TYPE_OUTPUT else end_socket
                     input_socket = end_socket if end_socket.socket_type == Socket.TYPE_INPUT else self.start_socket
                     
-                   
-                    if self.temp_connection:
-                        self.scene.removeItem(self.temp_connection)
-                    
                   
                     connection = Connection(
                         self.scene,
                         start_socket=output_socket,
                         end_socket=input_socket
                     )
-                    
-                    
-                    input_socket.value = output_socket.value
-                    input_socket.node.calculate_output()
-            else:
-                
-                if self.temp_connection:
-                    self.scene.removeItem(self.temp_connection)
             
             self.temp_connection = None
             self.connecting = False
@@ -3,6 +3,7 @@ from PyQt5.QtCore import QPointF, QByteArray, QDataStream, QIODevice, QMimeData
 from PyQt5.QtGui import QClipboard
 from src.nodes.base_nodes import Node, Connection, Socket
 from src.nodes.node_factory import NodeFactory
+from src.engine.gates import SOURCE_KINDS
 from PyQt5.QtGui import QCursor
 
 class NodeEditorCommand(QUndoCommand):
@@ -30,7 +31,7 @@ class AddNodeCommand(NodeEditorCommand):
         
         for item in self.scene.items():
             if isinstance(item, Node) and id(item) == self.node_id:
-                self.scene.removeItem(item)
+                item.remove()
                 break
 
 class RemoveNodeCommand(NodeEditorCommand):
@@ -56,6 +57,7 @@ class RemoveNodeCommand(NodeEditorCommand):
             'pos_x': node.pos().x(),
             'pos_y': node.pos().y(),
             'title': node.title,
+            'properties': node.get_properties() if hasattr(node, 'get_properties') else {},
             'socket_values': {
                 'inputs': [socket.value for socket in node.input_sockets],
                 'outputs': [socket.value for socket in node.output_sockets]
@@ -80,19 +82,15 @@ class RemoveNodeCommand(NodeEditorCommand):
         
     def redo(self):
   
-        for item in list(self.scene.items()):
-            if isinstance(item, Connection):
-                if (item.start_socket and item.start_socket.node == self.node) or \
-                   (item.end_socket and item.end_socket.node == self.node):
-                    self.scene.removeItem(item)
-                    
-      
-        self.scene.removeItem(self.node)
+        # Removes the node's connections along with it
+        self.node.remove()
     
     def undo(self):
       
         node = NodeFactory.create_node(self.scene, self.node_data['type'])
         node.setPos(self.node_data['pos_x'], self.node_data['pos_y'])
+        if hasattr(node, 'set_properties'):
+            node.set_properties(self.node_data['properties'])
         node.title = self.node_data['title']
         
         
@@ -119,13 +117,9 @@ class AddConnectionCommand(NodeEditorCommand):
        
         self.connection = Connection(self.scene, self.output_socket, self.input_socket)
         
-       
-        self.input_socket.value = self.output_socket.value
-        self.input_socket.node.calculate_output()
-        
     def undo(self):
-        if self.connection in self.scene.items():
-            self.scene.removeItem(self.connection)
+        if self.connection:
+            self.connection.remove()
 
 class RemoveConnectionCommand(NodeEditorCommand):
     """Command to remove a connection"""
@@ -136,15 +130,11 @@ class RemoveConnectionCommand(NodeEditorCommand):
         self.input_socket = connection.end_socket
         
     def redo(self):
-        self.scene.removeItem(self.connection)
+        self.connection.remove()
         
     def undo(self):
         
         self.connection = Connection(self.scene, self.output_socket, self.input_socket)
-        
-     
-        self.input_socket.value = self.output_socket.value
-        self.input_socket.node.calculate_output()
 
 class MoveNodeCommand(NodeEditorCommand):
     """Command to move a node"""
@@ -180,6 +170,7 @@ class NodeClipboard:
                 'pos_x': node.pos().x(),
                 'pos_y': node.pos().y(),
                 'title': node.title,
+                'properties': node.get_properties() if hasattr(node, 'get_properties') else {},
                 'socket_values': {
                     'inputs': [socket.value for socket in node.input_sockets],
                     'outputs': [socket.value for socket in node.output_sockets]
@@ -208,49 +199,53 @@ class NodeClipboard:
     def deserialize_nodes(scene, data, position_offset=QPointF(20, 20)):
         """Recreate nodes from serialized data"""
    
-        created_nodes = []
+        # Propagate once for the whole paste
+        with scene.bulk_load():
+            created_nodes = []
         
      
-        for node_data in data['nodes']:
-            node = NodeFactory.create_node(scene, node_data['type'])
+            for node_data in data['nodes']:
+                node = NodeFactory.create_node(scene, node_data['type'])
             
          
-            node.setPos(node_data['pos_x'] + position_offset.x(), 
-                       node_data['pos_y'] + position_offset.y())
+                node.setPos(node_data['pos_x'] + position_offset.x(), 
+                           node_data['pos_y'] + position_offset.y())
             
-            node.title = node_data['title']
+                if 'properties' in node_data and hasattr(node, 'set_properties'):
+                    node.set_properties(node_data['properties'])
+                node.title = node_data['title']
             
 
-            for i, value in enumerate(node_data['socket_values']['inputs']):
-                if i < len(node.input_sockets):
-                    node.input_sockets[i].value = value
+                for i, value in enumerate(node_data['socket_values']['inputs']):
+                    if i < len(node.input_sockets):
+                        node.input_sockets[i].value = value
                     
-            for i, value in enumerate(node_data['socket_values']['outputs']):
-                if i < len(node.output_sockets):
-                    node.output_sockets[i].value = value
+                for i, value in enumerate(node_data['socket_values']['outputs']):
+                    if i < len(node.output_sockets):
+                        node.output_sockets[i].value = value
+                        
+                if node.gate_type in SOURCE_KINDS and node.output_sockets:
+                    node.set_value(node.output_sockets[0].value)
                     
-            created_nodes.append(node)
+                created_nodes.append(node)
         
       
-        for conn_data in data['connections']:
-            if (0 <= conn_data['start_node_index'] < len(created_nodes) and
-                0 <= conn_data['end_node_index'] < len(created_nodes)):
+            for conn_data in data['connections']:
+                if (0 <= conn_data['start_node_index'] < len(created_nodes) and
+                    0 <= conn_data['end_node_index'] < len(created_nodes)):
                 
-                start_node = created_nodes[conn_data['start_node_index']]
-                end_node = created_nodes[conn_data['end_node_index']]
+                    start_node = created_nodes[conn_data['start_node_index']]
+                    end_node = created_nodes[conn_data['end_node_index']]
                 
-                if (conn_data['start_socket_index'] < len(start_node.output_sockets) and
-                    conn_data['end_socket_index'] < len(end_node.input_sockets)):
+                    if (conn_data['start_socket_index'] < len(start_node.output_sockets) and
+                        conn_data['end_socket_index'] < len(end_node.input_sockets)):
                     
-                    output_socket = start_node.output_sockets[conn_data['start_socket_index']]
-                    input_socket = end_node.input_sockets[conn_data['end_socket_index']]
+                        output_socket = start_node.output_sockets[conn_data['start_socket_index']]
+                        input_socket = end_node.input_sockets[conn_data['end_socket_index']]
                     
                   
-                    Connection(scene, output_socket, input_socket)
-                    
-                
-                    input_socket.value = output_socket.value
-                    input_socket.node.calculate_output()
+                        if output_socket.can_connect(input_socket):
+                            Connection(scene, output_socket, input_socket)
         
         return created_nodes
 
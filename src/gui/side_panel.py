@@ -31,6 +31,8 @@ class NodeListWidget(QListWidget):
             {"name": "NOR Gate", "type": "nor"},
             {"name": "XOR Gate", "type": "xor"},
             {"name": "XNOR Gate", "type": "xnor"},
+            {"name": "Clock", "type": "clock"},
+            {"name": "D Flip-Flop", "type": "dff"},
             {"name": "Write Output", "type": "file_output"} 
         ]
         
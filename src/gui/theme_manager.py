@@ -9,6 +9,9 @@ class ThemeManager:
     LIGHT_THEME = "light"
     DARK_THEME = "dark"
     
+    # Theme in use, cached so painting never goes back to QSettings
+    _current_theme = None
+    
    
     THEMES = {
         LIGHT_THEME: {
@@ -124,19 +127,23 @@ class ThemeManager:
 
         app.setPalette(palette)
         
-
-        settings = QSettings("LogicGateSimulator", "preferences")
-        settings.setValue("theme", theme_name)
-        settings.sync()
+        # Only write the settings file when the choice actually changed
+        if theme_name != cls.get_current_theme():
+            settings = QSettings("LogicGateSimulator", "preferences")
+            settings.setValue("theme", theme_name)
+            settings.sync()
+        cls._current_theme = theme_name
         
 
         return theme_name
     
     @classmethod
     def get_current_theme(cls):
-        """Get the currently applied theme name from settings"""
-        settings = QSettings("LogicGateSimulator", "preferences")
-        return settings.value("theme", cls.LIGHT_THEME)
+        """Get the currently applied theme name, read from settings once"""
+        if cls._current_theme is None:
+            settings = QSettings("LogicGateSimulator", "preferences")
+            cls._current_theme = settings.value("theme", cls.LIGHT_THEME)
+        return cls._current_theme
     
     @classmethod
     def toggle_theme(cls, app):
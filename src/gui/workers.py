@@ -0,0 +1,116 @@
+import csv
+import multiprocessing
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from src.engine.stimulus import open_stimulus, bind_inputs
+from src.engine.truth_table import generate_truth_table
+
+class TruthTableWorker(QThread):
+    """Generates a truth table file without blocking the GUI thread"""
+
+    progress = pyqtSignal(int, int)
+    succeeded = pyqtSignal(str, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, compiled, file_path, parent=None):
+        super().__init__(parent)
+        self.compiled = compiled
+        self.file_path = file_path
+
+    def run(self):
+        """Enumerate the inputs in a process pool"""
+        try:
+            # Spawned workers never inherit the GUI's Qt state
+            rows = generate_truth_table(
+                self.compiled,
+                self.file_path,
+                mp_context=multiprocessing.get_context("spawn"),
+                progress=self.progress.emit,
+                cancelled=self.isInterruptionRequested
+            )
+            self.succeeded.emit(self.file_path, rows)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class StimulusPlayer(QObject):
+    """Plays a stimulus file into a scene at a throttled rate
+
+    One row is applied per timer tick as a single input transaction, and
+    the outputs are appended to a CSV file straight away, so long files
+    stream through in constant memory.
+    """
+
+    stepped = pyqtSignal(int)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, simulation, stimulus_path, out_path, interval=100, parent=None):
+        super().__init__(parent)
+        self.simulation = simulation
+        self.interval = interval
+        self.steps = 0
+
+        # Inputs and outputs in screen order, as the command line sees them
+        columns, self.rows = open_stimulus(stimulus_path)
+        order = [node.gate_id for node in simulation.screen_order(simulation.nodes.values())]
+        gates = bind_inputs(simulation.circuit, columns, order)
+        self.inputs = [simulation.nodes[gate] for gate in gates]
+        self.outputs = simulation.screen_order(simulation.output_nodes())
+
+        try:
+            self.file = open(out_path, "w", newline="")
+        except OSError:
+            self._close_rows()
+            raise
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([node.title for node in self.outputs])
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._step)
+
+    def start(self):
+        """Start playing rows"""
+        self.timer.start(self.interval)
+
+    def stop(self):
+        """Stop playing and close the output file"""
+        self.timer.stop()
+        self._close_rows()
+        if not self.file.closed:
+            self.file.close()
+            self.finished.emit(self.steps)
+
+    def _close_rows(self):
+        """Close the stimulus file if rows are still being read from it"""
+        if hasattr(self.rows, 'close'):
+            self.rows.close()
+
+    def _step(self):
+        """Apply the next row and record the outputs"""
+        # Reading the stimulus or writing the outputs can fail part way, with
+        # UnicodeDecodeError among the ValueErrors
+        try:
+            row = next(self.rows, None)
+            if row is not None and len(row) != len(self.inputs):
+                raise ValueError(
+                    f"Step {self.steps + 1}: expected {len(self.inputs)} inputs, got {len(row)}"
+                )
+            if row is None:
+                self.stop()
+                return
+
+            self.simulation.set_inputs(dict(zip(self.inputs, row)))
+            circuit = self.simulation.circuit
+            self.writer.writerow([
+                circuit.input_value(node.gate_id) if node.input_sockets else 0
+                for node in self.outputs
+            ])
+        except (OSError, ValueError) as e:
+            self.timer.stop()
+            self._close_rows()
+            self.file.close()
+            self.failed.emit(str(e))
+            return
+
+        self.steps += 1
+        self.stepped.emit(self.steps)
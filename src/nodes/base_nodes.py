@@ -26,6 +26,15 @@ class Socket:
         """Calculate global position of the socket"""
         return self.node.pos() + self.position
     
+    def can_connect(self, other):
+        """Whether a wire may join this socket and another
+
+        One must be an input and the other an output, on nodes of the same
+        bus width.
+        """
+        return (self.socket_type != other.socket_type and
+                self.node.bus_width == other.node.bus_width)
+    
     def calculate_socket_position(self):
         """Calculate position in local node coordinates"""
         if self.socket_type == self.TYPE_INPUT:
@@ -76,15 +85,20 @@ class Connection(QGraphicsItem):
         
         # Initialize the connection properly
         if start_socket and end_socket:
+            # An input has a single driver, so a new wire replaces the old one
+            input_socket = end_socket if end_socket.socket_type == Socket.TYPE_INPUT else start_socket
+            for old in list(input_socket.connections):
+                if old is not self:
+                    old.remove()
+
             # Make sure connections are added to both sockets
             if self not in start_socket.connections:
                 start_socket.connections.append(self)
             if self not in end_socket.connections:
                 end_socket.connections.append(self)
             
-            # Propagate the initial value
-            end_socket.value = start_socket.value
-            end_socket.node.calculate_output()
+            # Wire up the circuit, which propagates the initial value
+            scene.simulation.connect(start_socket, end_socket)
         
         # Add highlighting state
         self.hovered = False
@@ -98,6 +112,18 @@ class Connection(QGraphicsItem):
             self.end_pos = self.end_socket.get_position()
         self.update()
         
+    def remove(self):
+        """Detach the connection from its sockets and remove it from the scene"""
+        for socket in (self.start_socket, self.end_socket):
+            if socket and self in socket.connections:
+                socket.connections.remove(self)
+                
+        if self.start_socket and self.end_socket:
+            self.scene.simulation.disconnect(self.start_socket, self.end_socket)
+            
+        if QGraphicsItem.scene(self) is not None:
+            self.scene.removeItem(self)
+        
     def boundingRect(self):
         """Define the bounding rectangle for the connection"""
         if not self.start_socket or not self.end_socket:
@@ -152,6 +178,11 @@ class Connection(QGraphicsItem):
             color = QColor(200, 200, 200) if not self.hovered else QColor(255, 255, 255)
         
         self.pen.setColor(color)
+        # Buses are drawn thicker than single wires
+        if self.start_socket and self.start_socket.node.bus_width > 1:
+            self.pen.setWidth(4)
+        else:
+            self.pen.setWidth(2)
         painter.setPen(self.pen)
         painter.drawPath(path)
         
@@ -225,6 +256,9 @@ class Connection(QGraphicsItem):
 class Node(QGraphicsItem):
     """Base class for all nodes in the logic gate simulator"""
     
+    # Gate kind simulated for this node in the scene's circuit
+    gate_type = "default"
+    
     def __init__(self, scene, title="Node", inputs=1, outputs=1):
         super().__init__()
         self.scene = scene
@@ -235,18 +269,22 @@ class Node(QGraphicsItem):
         self.edge_roundness = 10
         self.edge_padding = 10
         
-        # Make item movable
-        self.setFlag(QGraphicsItem.ItemIsMovable)
-        self.setFlag(QGraphicsItem.ItemIsSelectable)
-        self.setFlag(QGraphicsItem.ItemSendsGeometryChanges)
+        # Make item movable; one call, as every flag change goes through itemChange
+        self.setFlags(
+            QGraphicsItem.ItemIsMovable |
+            QGraphicsItem.ItemIsSelectable |
+            QGraphicsItem.ItemSendsGeometryChanges
+        )
         
         # Create sockets
         self.input_sockets = []
         self.output_sockets = []
         self.init_sockets(inputs, outputs)
         
-        # Add to scene
+        # Add to scene and register with its circuit
+        self.gate_id = None
         self.scene.addItem(self)
+        self.scene.simulation.add_node(self)
         
     def init_sockets(self, inputs, outputs):
         """Initialize input and output sockets"""
@@ -311,8 +349,11 @@ class Node(QGraphicsItem):
         # Draw the title
         painter.setPen(QPen(Qt.white, 1))
         painter.setFont(QFont("Arial", 10))
+        title = self.title
+        if self.bus_width > 1:
+            title = f"{title} [{self.bus_width}]"
         painter.drawText(self.edge_padding, self.title_height - self.edge_padding, 
-                        self.title)
+                        title)
         
         # Draw sockets
         self._draw_sockets(painter)
@@ -377,20 +418,73 @@ class Node(QGraphicsItem):
         return False
     
     def calculate_output(self):
-        """Calculate and propagate the output value"""
-        # Calculate output value
-        result = self._calculate()
-        
-        # Update output sockets
-        for socket in self.output_sockets:
-            socket.value = result
+        """Re-evaluate this node in the circuit and propagate the change"""
+        self.scene.simulation.evaluate(self)
+    
+    def sync_values(self, circuit):
+        """Mirror socket values from the circuit and redraw"""
+        values = circuit.values
+        for socket, net in zip(self.input_sockets, circuit.gate_inputs[self.gate_id]):
+            socket.value = values[net]
             
-            # Propagate to connected nodes
+        for socket, net in zip(self.output_sockets, circuit.gate_outputs[self.gate_id]):
+            socket.value = values[net]
             for connection in socket.connections:
-                if connection.end_socket:
-                    connection.end_socket.value = result
-                    # Trigger recalculation on the destination node
-                    connection.end_socket.node.calculate_output()
+                connection.update()
+                
+        self.update()
+    
+    @property
+    def bus_width(self):
+        """Bits carried by every socket; values are ints of this many bits"""
+        return self.scene.simulation.circuit.width(self.gate_id)
+    
+    def set_bus_width(self, width):
+        """Carry width bits on every socket
+        
+        Connections to sockets of another width are removed. To widen
+        several connected nodes, set their gates' width together with
+        SceneSimulation.set_width first, so the wires between them stay.
+        
+        Raises:
+            ValueError: If this kind of node cannot carry a bus
+        """
+        self.scene.simulation.set_width([self], width)
+        
+        for socket in self.input_sockets + self.output_sockets:
+            for connection in list(socket.connections):
+                other = connection.end_socket if socket is connection.start_socket else connection.start_socket
+                if other and not socket.can_connect(other):
+                    connection.remove()
+                    
+        self.update()
+    
+    def get_properties(self):
+        """Properties saved with the circuit"""
+        if self.bus_width > 1:
+            return {'width': self.bus_width}
+        return {}
+    
+    def get_saved_properties(self, base_dir):
+        """Properties as written to a circuit file in the directory base_dir"""
+        return self.get_properties()
+    
+    def set_properties(self, properties):
+        """Restore saved properties"""
+        width = properties.get('width', 1)
+        if width != self.bus_width:
+            self.set_bus_width(width)
+    
+    def remove(self):
+        """Remove the node and every connection attached to it"""
+        for socket in self.input_sockets + self.output_sockets:
+            for connection in list(socket.connections):
+                connection.remove()
+                
+        self.scene.simulation.remove_node(self)
+        
+        if QGraphicsItem.scene(self) is not None:
+            self.scene.removeItem(self)
     
     def itemChange(self, change, value):
         """Handle changes to the node"""
@@ -1,76 +1,23 @@
-from PyQt5.QtWidgets import QGraphicsItem, QLineEdit, QPushButton, QGraphicsProxyWidget
-from PyQt5.QtCore import Qt, QRectF
-from PyQt5.QtGui import QPainter, QPen, QBrush, QColor
-
-class Node(QGraphicsItem):
-    def __init__(self, scene, title, inputs=0, outputs=0):
-        super().__init__()
-        self.scene = scene
-        self.title = title
-        self.width = 150
-        self.height = 100
-        
-        # Enable item flags
-        self.setFlag(QGraphicsItem.ItemIsSelectable)
-        self.setFlag(QGraphicsItem.ItemIsMovable)
-        
-        # Set up inputs and outputs
-        self.input_sockets = []
-        self.output_sockets = []
-        
-        # Create sockets
-        for i in range(inputs):
-            socket = Socket(self, i, Socket.INPUT)
-            self.input_sockets.append(socket)
-            
-        for i in range(outputs):
-            socket = Socket(self, i, Socket.OUTPUT)
-            self.output_sockets.append(socket)
-            
-        # Make sure this node is drawn above edges but widgets are on top
-        self.setZValue(0)
-    
-    def boundingRect(self):
-        return QRectF(0, 0, self.width, self.height)
-    
-    def paint(self, painter, option, widget=None):
-        # Draw node background
-        painter.setPen(QPen(QColor("#3f3f3f")))
-        painter.setBrush(QBrush(QColor("#2a2a2a")))
-        painter.drawRoundedRect(0, 0, self.width, self.height, 10, 10)
-        
-        # Draw title
-        painter.setPen(QPen(Qt.white))
-        painter.drawText(10, 20, self.title)
-    
-    def calculate_output(self):
-        """Calculate and propagate the output value"""
-        for out_socket in self.output_sockets:
-            if out_socket.edges:
-                for edge in out_socket.edges:
-                    edge.propagate_value()
-
-
-class Socket:
-    INPUT = 1
-    OUTPUT = 2
-    
-    def __init__(self, node, index, socket_type):
-        self.node = node
-        self.index = index
-        self.socket_type = socket_type
-        self.value = False
-        self.edges = []
-
+from PyQt5.QtWidgets import QLineEdit, QPushButton, QCheckBox, QFileDialog
+from PyQt5.QtCore import QTimer
+from src.nodes.base_nodes import Node
+from src.nodes.node_factory import NodeFactory
+from src.engine.value_log import ValueLogger
+from src.engine.stimulus import parse_value
 
+@NodeFactory.register
 class InputNode(Node):
+    """Input node with editable value"""
+    gate_type = "input"
+    
     def __init__(self, scene):
         super().__init__(scene, title="Input", inputs=0, outputs=1)
+        # Initialize value attribute
         self.value = False
         
-        # Add input field with larger size and better positioning
+        # Add input field
         self.input_field = QLineEdit()
-        self.input_field.setFixedSize(40, 25)  # Make it bigger
+        self.input_field.setFixedSize(40, 25)
         self.input_field.setText("0")
         self.input_field.setStyleSheet("""
             QLineEdit {
@@ -83,42 +30,46 @@ class InputNode(Node):
         """)
         self.input_field.textChanged.connect(self._on_value_changed)
         
-        # Add to scene with adjusted position
+        # Add to scene
         proxy = scene.addWidget(self.input_field)
         proxy.setParentItem(self)
-        proxy.setPos(20, 30)  # Adjust position to be more visible
-        proxy.setZValue(1)    # Ensure it's drawn above the node
-        
-        # Store the proxy for future reference
-        self.input_proxy = proxy
-    
+        proxy.setPos(20, 30)
+
+    def set_value(self, value):
+        """Set the input as if the value had been typed into the field"""
+        self.input_field.setText(str(int(value)))
+
+    def set_bus_width(self, width):
+        """Widen the field for bus values and drive the value at the new width"""
+        super().set_bus_width(width)
+        self.input_field.setFixedSize(40 if width == 1 else 100, 25)
+        self._on_value_changed(self.input_field.text())
+
     def _on_value_changed(self, text):
         """Handle input value changes"""
         try:
-            self.value = bool(int(text))
-            self.output_sockets[0].value = self.value
-            # Propagate change
-            self.calculate_output()
+            # Any true value drives a single bit high; buses take an
+            # integer, in decimal or with a 0x/0b prefix
+            value = parse_value(text)
+            self.value = self.scene.simulation.circuit.fit_value(self.gate_id, value)
+            
+            # Drive the circuit, which propagates through connected nodes
+            self.scene.simulation.set_input(self, self.value)
+                        
         except ValueError:
             self.input_field.setText("0")
-            
-    def paint(self, painter, option, widget=None):
-        # First call the parent class paint method
-        super().paint(painter, option, widget)
-        
-        # Force update of the widget visibility
-        if hasattr(self, 'input_proxy'):
-            self.input_proxy.update()
-
 
+@NodeFactory.register
 class OutputNode(Node):
+    """Output node that displays result"""
+    gate_type = "output"
+    
     def __init__(self, scene):
         super().__init__(scene, title="Output", inputs=1, outputs=0)
-        self.value = False
         
         # Add display field
         self.display = QLineEdit()
-        self.display.setFixedWidth(30)
+        self.display.setFixedSize(40, 25)
         self.display.setReadOnly(True)
         self.display.setText("0")
         self.display.setStyleSheet("""
@@ -134,41 +85,42 @@ class OutputNode(Node):
         # Add to scene
         proxy = scene.addWidget(self.display)
         proxy.setParentItem(self)
-        proxy.setPos(60, 40)
-        proxy.setZValue(1)  # Ensure it's drawn above the node
-        
-        # Store the proxy for future reference
-        self.display_proxy = proxy
-    
-    def calculate_output(self):
+        proxy.setPos(20, 30)
+
+    def set_bus_width(self, width):
+        """Widen the display for bus values"""
+        super().set_bus_width(width)
+        self.display.setFixedSize(40 if width == 1 else 100, 25)
+
+    def sync_values(self, circuit):
         """Update display value"""
+        super().sync_values(circuit)
         if self.input_sockets:
-            self.value = self.input_sockets[0].value
-            self.display.setText("1" if self.value else "0")
-            
-    def paint(self, painter, option, widget=None):
-        # First call the parent class paint method
-        super().paint(painter, option, widget)
-        
-        # Force update of the widget visibility
-        if hasattr(self, 'display_proxy'):
-            self.display_proxy.update()
-
+            value = self.input_sockets[0].value
+            self.display.setText(str(int(value)))
 
+@NodeFactory.register
 class FileOutputNode(Node):
+    """Output node that logs value changes to a file"""
+    gate_type = "file_output"
+    
     def __init__(self, scene):
-        super().__init__(scene, title="File Output", inputs=1, outputs=0)
-        self.value = False
+        super().__init__(scene, title="Write Output", inputs=1, outputs=0)
+        self.path = "output.txt"
+        self.append = True
+        self.logger = None
+        self.logged_value = None
         
-        # Add save button
-        self.save_button = QPushButton("Save")
+        # Add start/stop logging button
+        self.save_button = QPushButton("Start Log")
+        self.save_button.setFixedSize(80, 25)
         self.save_button.setStyleSheet("""
             QPushButton {
                 background-color: #2b2b2b;
                 color: white;
                 border: 1px solid #3f3f3f;
                 border-radius: 3px;
-                padding: 4px;
+                padding: 2px;
             }
             QPushButton:hover {
                 background-color: #3b3b3b;
@@ -177,27 +129,163 @@ class FileOutputNode(Node):
                 background-color: #1b1b1b;
             }
         """)
-        self.save_button.clicked.connect(self._save_to_file)
+        self.save_button.clicked.connect(self._toggle_logging)
         
-        # Add to scene
+        # Add append option
+        self.append_box = QCheckBox("Append")
+        self.append_box.setChecked(self.append)
+        self.append_box.setStyleSheet("QCheckBox { color: white; background: transparent; }")
+        self.append_box.toggled.connect(self._on_append_toggled)
+        
+        # Add widgets to scene
         proxy = scene.addWidget(self.save_button)
         proxy.setParentItem(self)
-        proxy.setPos(40, 40)
-        proxy.setZValue(1)  # Ensure it's drawn above the node
+        proxy.setPos(35, 40)  # Center the button in node
+        
+        proxy = scene.addWidget(self.append_box)
+        proxy.setParentItem(self)
+        proxy.setPos(40, 70)
+        
+    def _on_append_toggled(self, checked):
+        """Remember whether new logs keep existing records"""
+        self.append = checked
         
-        # Store the proxy for future reference
-        self.button_proxy = proxy
+    def _toggle_logging(self):
+        """Pick a log file and start logging, or stop a running log"""
+        if self.logger:
+            self.shutdown()
+            return
+            
+        path, _ = QFileDialog.getSaveFileName(
+            None,
+            "Log Output To",
+            self.path,
+            "Text Files (*.txt);;All Files (*)",
+            options=QFileDialog.DontConfirmOverwrite
+        )
+        if not path:
+            return
+            
+        try:
+            self.logger = ValueLogger(path, self.append)
+        except OSError as e:
+            print(f"Error opening log file: {str(e)}")
+            return
+            
+        self.path = path
+        self.logged_value = None
+        self.save_button.setText("Stop Log")
+        self._log_value()
+        
+    def _log_value(self):
+        """Queue the input value if it changed since the last record"""
+        if self.logger and self.input_sockets:
+            value = 1 if self.input_sockets[0].value else 0
+            if value != self.logged_value:
+                self.logged_value = value
+                self.logger.log(self.title, value)
+        
+    def sync_values(self, circuit):
+        """Log value changes while logging is on"""
+        super().sync_values(circuit)
+        self._log_value()
+        
+    def shutdown(self):
+        """Stop logging and write out the remaining records"""
+        if self.logger:
+            self.logger.close()
+            if self.logger.error:
+                print(f"Error writing to file: {str(self.logger.error)}")
+            self.logger = None
+            self.save_button.setText("Start Log")
+            
+    def remove(self):
+        """Stop logging before removing the node"""
+        self.shutdown()
+        super().remove()
+        
+    def get_properties(self):
+        """Properties saved with the circuit"""
+        return {'path': self.path, 'append': self.append}
     
-    def _save_to_file(self):
-        """Save output value to file"""
-        if self.input_sockets:
-            with open("output.txt", "w") as f:
-                f.write(str(int(self.input_sockets[0].value)))
-                
-    def paint(self, painter, option, widget=None):
-        # First call the parent class paint method
-        super().paint(painter, option, widget)
-        
-        # Force update of the widget visibility
-        if hasattr(self, 'button_proxy'):
-            self.button_proxy.update()
\ No newline at end of file
+    def set_properties(self, properties):
+        """Restore saved properties"""
+        self.path = properties.get('path', self.path)
+        self.append_box.setChecked(properties.get('append', self.append))
+
+@NodeFactory.register
+class ClockNode(Node):
+    """Clock source that toggles its output on a timer"""
+    gate_type = "clock"
+    
+    def __init__(self, scene, interval=500):
+        super().__init__(scene, title="Clock", inputs=0, outputs=1)
+        self.value = False
+        self.interval = interval
+        
+        # Timer driving the clock while it runs
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._tick)
+        
+        # Add start/stop button
+        self.run_button = QPushButton("Start")
+        self.run_button.setFixedSize(80, 25)
+        self.run_button.setStyleSheet("""
+            QPushButton {
+                background-color: #2b2b2b;
+                color: white;
+                border: 1px solid #3f3f3f;
+                border-radius: 3px;
+                padding: 2px;
+            }
+            QPushButton:hover {
+                background-color: #3b3b3b;
+            }
+            QPushButton:pressed {
+                background-color: #1b1b1b;
+            }
+        """)
+        self.run_button.clicked.connect(self._toggle_running)
+        
+        # Add button to scene
+        proxy = scene.addWidget(self.run_button)
+        proxy.setParentItem(self)
+        proxy.setPos(35, 40)
+        
+    def _toggle_running(self):
+        """Start or stop the clock"""
+        if self.timer.isActive():
+            self.timer.stop()
+            self.run_button.setText("Start")
+        else:
+            self.timer.start(self.interval)
+            self.run_button.setText("Stop")
+            
+    def _tick(self):
+        """Flip the clock level and propagate it"""
+        simulation = self.scene.simulation
+        if simulation.nodes.get(self.gate_id) is not self:
+            # The node was removed or its scene cleared
+            self.timer.stop()
+            return
+            
+        self.value = not self.value
+        simulation.set_input(self, self.value)
+        
+    def set_value(self, value):
+        """Drive the clock level directly, e.g. from a stimulus file"""
+        self.value = bool(value)
+        self.scene.simulation.set_input(self, self.value)
+        
+    def remove(self):
+        """Stop the clock before removing the node"""
+        self.timer.stop()
+        super().remove()
+        
+    def get_properties(self):
+        """Properties saved with the circuit"""
+        return {'interval': self.interval}
+    
+    def set_properties(self, properties):
+        """Restore saved properties"""
+        self.interval = properties.get('interval', self.interval)
@@ -1,60 +1,97 @@
-from PyQt5.QtWidgets import QGraphicsItem, QLineEdit
-from .base_nodes import Node
+from src.nodes.base_nodes import Node
+from src.nodes.node_factory import NodeFactory
 
+@NodeFactory.register
 class AndNode(Node):
+    gate_type = "and"
+    
     def __init__(self, scene):
         super().__init__(scene, title="AND", inputs=2, outputs=1)
     
     def _calculate(self):
-        """Perform AND operation"""
+        """Calculate AND result"""
         return all(socket.value for socket in self.input_sockets)
 
+@NodeFactory.register
 class OrNode(Node):
+    gate_type = "or"
+    
     def __init__(self, scene):
         super().__init__(scene, title="OR", inputs=2, outputs=1)
     
     def _calculate(self):
-        """Perform OR operation"""
+        """Calculate OR result"""
         return any(socket.value for socket in self.input_sockets)
 
+@NodeFactory.register
 class NotNode(Node):
+    gate_type = "not"
+    
     def __init__(self, scene):
         super().__init__(scene, title="NOT", inputs=1, outputs=1)
     
     def _calculate(self):
-        """Perform NOT operation"""
+        """Calculate NOT result"""
         if self.input_sockets:
             return not self.input_sockets[0].value
         return False
 
+@NodeFactory.register
 class NandNode(Node):
+    gate_type = "nand"
+    
     def __init__(self, scene):
         super().__init__(scene, title="NAND", inputs=2, outputs=1)
     
     def _calculate(self):
-        """Perform NAND operation"""
+        """Calculate NAND result"""
         return not all(socket.value for socket in self.input_sockets)
 
+@NodeFactory.register
 class NorNode(Node):
+    gate_type = "nor"
+    
     def __init__(self, scene):
         super().__init__(scene, title="NOR", inputs=2, outputs=1)
     
     def _calculate(self):
-        """Perform NOR operation"""
+        """Calculate NOR result"""
         return not any(socket.value for socket in self.input_sockets)
 
+@NodeFactory.register
 class XorNode(Node):
+    gate_type = "xor"
+    
     def __init__(self, scene):
         super().__init__(scene, title="XOR", inputs=2, outputs=1)
     
     def _calculate(self):
-        """Perform XOR operation"""
-        return sum(socket.value for socket in self.input_sockets) == 1
+        """Calculate XOR result"""
+        if len(self.input_sockets) >= 2:
+            return self.input_sockets[0].value != self.input_sockets[1].value
+        return False
 
+@NodeFactory.register
 class XnorNode(Node):
+    gate_type = "xnor"
+    
     def __init__(self, scene):
         super().__init__(scene, title="XNOR", inputs=2, outputs=1)
     
     def _calculate(self):
-        """Perform XNOR operation"""
-        return sum(socket.value for socket in self.input_sockets) != 1
\ No newline at end of file
+        """Calculate XNOR result"""
+        if len(self.input_sockets) >= 2:
+            return self.input_sockets[0].value == self.input_sockets[1].value
+        return True
+
+@NodeFactory.register
+class DffNode(Node):
+    """D flip-flop loading D on the rising edge of CLK"""
+    gate_type = "dff"
+    
+    def __init__(self, scene):
+        super().__init__(scene, title="D Flip-Flop", inputs=2, outputs=1)
+    
+    def _calculate(self):
+        """Flip-flops only change on a clock edge"""
+        return self.output_sockets[0].value
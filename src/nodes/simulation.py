@@ -0,0 +1,211 @@
+from contextlib import contextmanager
+
+from src.engine.circuit import Circuit
+from src.engine.gates import SOURCE_KINDS, SINK_KINDS
+from src.engine.scheduler import OscillationError
+from src.engine.sequential import CycleSimulator
+
+
+class SceneSimulation:
+    """Keeps a headless Circuit in step with the nodes of a scene
+
+    The circuit owns every signal value. Nodes register a gate when they are
+    created and only mirror the values of nets that changed.
+
+    Edits mark the gates they touch dirty. Flushing evaluates those gates
+    and whatever their changes reach in one levelized pass, so an edit
+    costs time in proportion to its fan-out cone, not the whole circuit.
+    Inside deferred(), flushing waits until the outermost block ends.
+
+    Args:
+        on_oscillation: Optional callback(nodes, message) for feedback loops
+            that never settle
+    """
+
+    def __init__(self, on_oscillation=None):
+        self.circuit = Circuit()
+        self.nodes = {}
+        self.on_oscillation = on_oscillation
+        self._dirty = set()
+        self._driven = set()
+        self._deferred = 0
+
+    @contextmanager
+    def deferred(self):
+        """Batch edits, such as a paste or a load, into a single flush
+
+        This is also the transaction for driving inputs: values set inside
+        the block are applied right away and propagated once at the end.
+        """
+        self._deferred += 1
+        try:
+            yield self
+        finally:
+            self._deferred -= 1
+            if not self._deferred:
+                self.flush()
+
+    def mark_dirty(self, gates):
+        """Queue gates for re-evaluation, flushing unless deferred"""
+        self._dirty.update(gates)
+        if not self._deferred:
+            self.flush()
+
+    def flush(self):
+        """Evaluate dirty gates and everything their changes reach"""
+        if not self._dirty:
+            return
+        gates = [gate for gate in self._dirty if gate in self.nodes]
+        driven = self._driven
+        self._dirty = set()
+        self._driven = set()
+        self._run(gates, self.circuit.propagate, gates, driven)
+
+    def add_node(self, node):
+        """Register a node's gate and return its id"""
+        if getattr(node, 'definition', None) is not None:
+            gate = self.circuit.add_subcircuit(node.definition, node.title)
+        else:
+            gate = self.circuit.add_gate(
+                node.gate_type,
+                len(node.input_sockets),
+                len(node.output_sockets),
+                node.title
+            )
+        self.nodes[gate] = node
+        node.gate_id = gate
+
+        # The node is still being built, so it is only refreshed by a
+        # deferred flush, once construction has finished
+        if self._deferred:
+            self._dirty.add(gate)
+        else:
+            self._run((), self.circuit.propagate, [gate])
+        return gate
+
+    def remove_node(self, node):
+        """Drop a node's gate from the circuit"""
+        gate = node.gate_id
+        if self.nodes.pop(gate, None) is None:
+            return
+        self.mark_dirty(self.circuit.remove_gate(gate))
+
+    def connect(self, output_socket, input_socket):
+        """Wire an output socket to an input socket"""
+        gate = input_socket.node.gate_id
+        self.circuit.connect(
+            output_socket.node.gate_id, output_socket.index,
+            gate, input_socket.index
+        )
+        self.mark_dirty([gate])
+
+    def set_width(self, nodes, width):
+        """Change the bus width of nodes' gates, see Circuit.set_width"""
+        self.mark_dirty(self.circuit.set_width([node.gate_id for node in nodes], width))
+
+    def disconnect(self, output_socket, input_socket):
+        """Remove the wire between two sockets"""
+        src_gate = output_socket.node.gate_id
+        gate = input_socket.node.gate_id
+        if src_gate not in self.nodes or gate not in self.nodes:
+            return
+        net = self.circuit.gate_outputs[src_gate][output_socket.index]
+        if self.circuit.disconnect(gate, input_socket.index, net):
+            self.mark_dirty([gate])
+
+    def set_input(self, node, value):
+        """Drive an input node and propagate the change"""
+        gate = node.gate_id
+        if not self._deferred:
+            self.flush()
+            self._run((), self.circuit.set_input, gate, value)
+            return
+        nets = self.circuit.drive(gate, value)
+        self._driven.update(nets)
+        readers = [reader for net in nets for reader in self.circuit.net_fanout[net]]
+        self.mark_dirty([gate] + readers)
+
+    def set_inputs(self, values):
+        """Drive several input nodes and propagate once
+
+        Args:
+            values: Mapping of input node to value
+        """
+        with self.deferred():
+            for node, value in values.items():
+                node.set_value(value)
+
+    def input_nodes(self):
+        """Input nodes in the order they were added"""
+        kinds = self.circuit.kinds
+        return [node for gate, node in sorted(self.nodes.items())
+                if kinds[gate] in SOURCE_KINDS]
+
+    def screen_order(self, nodes):
+        """Nodes top to bottom, then left to right, the order files load in"""
+        return sorted(nodes, key=lambda node: (node.pos().y(), node.pos().x()))
+
+    def output_nodes(self):
+        """Output nodes in the order they were added"""
+        kinds = self.circuit.kinds
+        return [node for gate, node in sorted(self.nodes.items())
+                if kinds[gate] in SINK_KINDS]
+
+    def evaluate(self, node):
+        """Re-evaluate a node and everything its change reaches"""
+        self.mark_dirty([node.gate_id])
+
+    def cone_nodes(self, nodes, fanout=True):
+        """Nodes in the fan-out (or fan-in) cone of any of the given nodes"""
+        cones = self.circuit.cones
+        walk = cones.fanout_cone if fanout else cones.fanin_cone
+        gates = set()
+        for node in nodes:
+            if node.gate_id not in gates:
+                gates.update(walk(node.gate_id))
+        return [self.nodes[gate] for gate in gates if gate in self.nodes]
+
+    def cone_endpoints(self, node):
+        """Output nodes depending on a node and input nodes it depends on"""
+        cones = self.circuit.cones
+        outputs = [self.nodes[gate] for gate in cones.outputs_of(node.gate_id)]
+        inputs = [self.nodes[gate] for gate in cones.inputs_of(node.gate_id)]
+        return outputs, inputs
+
+    def run_cycles(self, cycles):
+        """Run clock cycles with the cycle-based kernel and show the result"""
+        self.flush()
+        simulator = CycleSimulator(self.circuit)
+        simulator.run(cycles)
+        self._run((), simulator.store, self.circuit)
+
+    def _run(self, gates, step, *args):
+        """Run a propagation step and mirror its changes
+
+        Args:
+            gates: Gates whose sockets need a refresh regardless
+            step: Circuit method returning the set of changed nets
+            args: Arguments for step
+        """
+        try:
+            changed = step(*args)
+        except OscillationError as e:
+            self._refresh(e.changed, gates)
+            if self.on_oscillation:
+                nodes = [self.nodes[gate] for gate in e.gates if gate in self.nodes]
+                self.on_oscillation(nodes, str(e))
+            return
+        self._refresh(changed, gates)
+
+    def _refresh(self, changed_nets, gates=()):
+        """Mirror changed nets onto the nodes that drive or read them"""
+        circuit = self.circuit
+        stale = set(gates)
+        for net in changed_nets:
+            stale.add(circuit.net_driver[net])
+            stale.update(circuit.net_fanout[net])
+
+        for gate in stale:
+            node = self.nodes.get(gate)
+            if node is not None:
+                node.sync_values(circuit)
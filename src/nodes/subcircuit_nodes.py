@@ -0,0 +1,109 @@
+import os
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QPen, QFont
+from src.nodes.base_nodes import Node
+from src.nodes.node_factory import NodeFactory
+from src.engine.subcircuit import load_definition
+
+@NodeFactory.register
+class SubcircuitNode(Node):
+    """Instance of a saved circuit, with its inputs and outputs as sockets
+
+    All instances of one file share a single SubcircuitDefinition, so each
+    one is a single item and a single gate however large the circuit is.
+    """
+    gate_type = "subcircuit"
+
+    def __init__(self, scene, definition=None):
+        # Read by the scene's simulation when the node registers its gate
+        self.definition = definition
+        self.path = definition.path if definition else ""
+
+        if definition:
+            super().__init__(scene, title=definition.name,
+                             inputs=len(definition.inputs), outputs=len(definition.outputs))
+        else:
+            super().__init__(scene, title="Subcircuit", inputs=0, outputs=0)
+        self._fit_height()
+
+    def _fit_height(self):
+        """Make room for the sockets on the longer side"""
+        pins = max(len(self.input_sockets), len(self.output_sockets))
+        self.prepareGeometryChange()
+        self.height = max(100, self.title_height + 20 * (pins + 1))
+
+    def set_definition(self, definition):
+        """Switch to another definition, rebuilding the sockets and gate"""
+        for socket in self.input_sockets + self.output_sockets:
+            for connection in list(socket.connections):
+                connection.remove()
+
+        simulation = self.scene.simulation
+        simulation.remove_node(self)
+
+        self.definition = definition
+        self.path = definition.path
+        self.title = definition.name
+        self.input_sockets = []
+        self.output_sockets = []
+        self.init_sockets(len(definition.inputs), len(definition.outputs))
+        self._fit_height()
+
+        simulation.add_node(self)
+
+    def paint(self, painter, option, widget=None):
+        """Draw the node with the name of each pin"""
+        super().paint(painter, option, widget)
+        if not self.definition:
+            return
+
+        painter.setPen(QPen(Qt.black, 1))
+        painter.setFont(QFont("Arial", 8))
+        half = self.width / 2 - 12
+        for socket, name in zip(self.input_sockets, self.definition.inputs):
+            y = socket.position.y()
+            painter.drawText(QRectF(12, y - 8, half, 16), Qt.AlignLeft | Qt.AlignVCenter, name)
+
+        for socket, name in zip(self.output_sockets, self.definition.outputs):
+            y = socket.position.y()
+            painter.drawText(QRectF(self.width / 2, y - 8, half, 16),
+                             Qt.AlignRight | Qt.AlignVCenter, name)
+
+    def get_properties(self):
+        """Properties saved with the circuit"""
+        return {'path': self.path}
+
+    def get_saved_properties(self, base_dir):
+        """Properties with the path relative to the circuit file's directory
+
+        Paths on another drive cannot be made relative and stay absolute.
+        """
+        properties = self.get_properties()
+        # A path that failed to load is still relative to the loaded file
+        path = os.path.join(self.scene.base_dir, properties['path'])
+        if properties['path'] and os.path.isabs(path):
+            try:
+                properties['path'] = os.path.relpath(path, base_dir)
+            except ValueError:
+                pass
+        return properties
+
+    def set_properties(self, properties):
+        """Load the saved subcircuit file
+
+        Relative paths start from the directory of the loaded file. Once
+        loaded, the absolute path is kept.
+        """
+        path = properties.get('path', self.path)
+        if not path or path == self.path:
+            return
+
+        try:
+            definition = load_definition(os.path.join(self.scene.base_dir, path))
+        except (OSError, ValueError) as e:
+            # Keep the path so saving again does not lose it
+            print(f"Error loading subcircuit: {str(e)}")
+            self.path = path
+            return
+
+        self.set_definition(definition)